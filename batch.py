@@ -0,0 +1,281 @@
+# Solving many tile game boards at once with NumPy.
+#
+# Instead of one Python-level search per board, every board in the batch is
+# searched together. Each round takes, for every unsolved board, all of its
+# open nodes with the smallest f = g + h, and expands them with one array
+# operation per swap. Boards are PackedTileGameStates held in uint64 arrays,
+# tagged with the index of the board they belong to.
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tilegameproblem import PackedTileGame, TileGameState
+
+ALGORITHMS = ("bfs", "astar")
+
+
+def manhattan_batch(problem: PackedTileGame, states: np.ndarray) -> np.ndarray:
+    """
+    Produces problem.manhattan_distance of every packed state in states, a
+    uint64 array, in one vectorized pass.
+    """
+    dim, bits, mask = problem.dim, problem.bits, problem.mask
+    goal_cells = np.empty(dim * dim, dtype=np.int64)
+    for cell in range(dim * dim):
+        goal_cells[(problem.goal_state >> (cell * bits)) & mask] = cell
+    cells = np.arange(dim * dim)
+    # distances[t, cell]: Manhattan distance from cell to the goal cell of t
+    distances = np.abs(cells // dim - goal_cells[:, None] // dim) + np.abs(
+        cells % dim - goal_cells[:, None] % dim
+    )
+
+    total = np.zeros(len(states), dtype=np.int64)
+    for cell in range(dim * dim):
+        tiles = (states >> np.uint64(cell * bits)) & np.uint64(mask)
+        total += distances[tiles.astype(np.int64), cell]
+    return total
+
+
+def find_nodes(
+    run_inst: np.ndarray,
+    run_states: np.ndarray,
+    inst: np.ndarray,
+    states: np.ndarray,
+) -> np.ndarray:
+    """
+    Produces the position of each (inst, states) pair in the arrays
+    run_inst and run_states, or -1 for pairs not in them. Both the run and
+    the pairs must be sorted by board and then state, so that each board's
+    states are found with one searchsorted.
+    """
+    positions = np.full(len(inst), -1, dtype=np.int64)
+    boards = np.unique(inst)
+    query_lo = np.searchsorted(inst, boards, "left")
+    query_hi = np.searchsorted(inst, boards, "right")
+    run_lo = np.searchsorted(run_inst, boards, "left")
+    run_hi = np.searchsorted(run_inst, boards, "right")
+    for q_lo, q_hi, r_lo, r_hi in zip(
+        query_lo.tolist(), query_hi.tolist(), run_lo.tolist(), run_hi.tolist()
+    ):
+        if r_lo == r_hi:
+            continue
+        segment = run_states[r_lo:r_hi]
+        found = np.searchsorted(segment, states[q_lo:q_hi])
+        found[found == len(segment)] = 0
+        hit = segment[found] == states[q_lo:q_hi]
+        positions[q_lo:q_hi][hit] = r_lo + found[hit]
+    return positions
+
+
+class SeenIndex:
+    """
+    The latest node generated for every (board, state), kept as a few runs
+    sorted by board and then state, each merged into the one before once it
+    has grown about as large. Adding n nodes over a search then costs
+    O(n log n) in all, rather than re-sorting everything seen every round.
+    """
+
+    def __init__(self):
+        # (inst, states, nodes) of each run
+        self.runs: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+    def lookup(self, inst: np.ndarray, states: np.ndarray) -> np.ndarray:
+        """
+        Produces the latest node added for each (inst, states) pair, or -1
+        for pairs never added. The pairs must be sorted by board and then
+        state.
+        """
+        latest = np.full(len(inst), -1, dtype=np.int64)
+        for run_inst, run_states, run_nodes in self.runs:
+            positions = find_nodes(run_inst, run_states, inst, states)
+            hit = positions >= 0
+            latest[hit] = np.maximum(latest[hit], run_nodes[positions[hit]])
+        return latest
+
+    def add(self, inst: np.ndarray, states: np.ndarray, nodes: np.ndarray):
+        """
+        Adds distinct (inst, states) pairs for nodes, which must be later
+        (larger) than any added before.
+        """
+        order = np.lexsort((states, inst))
+        self.runs.append((inst[order], states[order], nodes[order]))
+        runs = self.runs
+        while len(runs) > 1 and len(runs[-2][0]) <= 2 * len(runs[-1][0]):
+            merged_inst, merged_states, merged_nodes = (
+                np.concatenate([a, b]) for a, b in zip(runs[-2], runs[-1])
+            )
+            # the latest node of each pair is last among its copies
+            order = np.lexsort((merged_nodes, merged_states, merged_inst))
+            merged_inst = merged_inst[order]
+            merged_states = merged_states[order]
+            last = np.ones(len(order), dtype=bool)
+            last[:-1] = (merged_inst[1:] != merged_inst[:-1]) | (
+                merged_states[1:] != merged_states[:-1]
+            )
+            runs[-2:] = [
+                (merged_inst[last], merged_states[last], merged_nodes[order][last])
+            ]
+
+
+class Nodes:
+    """
+    Every node generated, as parallel arrays: its state, g, parent node (-1
+    for a start state) and whether a cheaper node for the same board and
+    state has since replaced it. The arrays double in capacity as they fill,
+    so adding nodes costs amortized O(1) each.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.states = np.empty(0, dtype=np.uint64)
+        self.g = np.empty(0, dtype=np.int64)
+        self.parents = np.empty(0, dtype=np.int64)
+        self.superseded = np.empty(0, dtype=bool)
+
+    def add(
+        self, states: np.ndarray, g: np.ndarray, parents: np.ndarray
+    ) -> np.ndarray:
+        """
+        Adds the nodes, producing their indices.
+        """
+        end = self.size + len(states)
+        if end > len(self.states):
+            capacity = max(end, 2 * len(self.states))
+            for name in ("states", "g", "parents", "superseded"):
+                old = getattr(self, name)
+                grown = np.zeros(capacity, dtype=old.dtype)
+                grown[: self.size] = old[: self.size]
+                setattr(self, name, grown)
+        self.states[self.size : end] = states
+        self.g[self.size : end] = g
+        self.parents[self.size : end] = parents
+        nodes = np.arange(self.size, end)
+        self.size = end
+        return nodes
+
+
+def solve_batch(
+    boards: Sequence[TileGameState],
+    algorithm: str = "astar",
+    goal_state: Optional[TileGameState] = None,
+) -> List[List[TileGameState]]:
+    """
+    Finds a shortest path to the goal for every board in boards.
+
+    Input:
+        boards - tile game boards, all of the same dimension, at most 4
+        algorithm - "astar" to order the search by the Manhattan heuristic of
+                    tilegame_heuristic (measured to the goal state), or "bfs"
+                    to search by depth alone. Both find shortest paths.
+        goal_state - the goal shared by all boards, the usual one by default
+
+    Output: a list with the path found for each board, in the same order as
+    boards, each a list of states as produced by bfs or astar
+
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"algorithm must be one of {ALGORITHMS}")
+    if not boards:
+        return []
+    dim = len(boards[0])
+    if any(len(board) != dim for board in boards):
+        raise ValueError("all boards must have the same dimension")
+    problem = PackedTileGame(dim, boards[0], goal_state)
+    if problem.bits * dim * dim > 64:
+        raise ValueError("solve_batch only supports boards that pack into 64 bits")
+
+    mask = np.uint64(problem.mask)
+    swaps = [(np.uint64(s1), np.uint64(s2)) for s1, s2 in problem.swaps]
+    goal = np.uint64(problem.goal_state)
+
+    def heuristic(states):
+        if algorithm == "bfs":
+            return np.zeros(len(states), dtype=np.int64)
+        return manhattan_batch(problem, states) // 2
+
+    num_boards = len(boards)
+    starts = np.array([problem.pack(board) for board in boards], dtype=np.uint64)
+    nodes = Nodes()
+    start_nodes = nodes.add(starts, np.zeros(num_boards), np.full(num_boards, -1))
+    seen = SeenIndex()
+    seen.add(np.arange(num_boards), starts, start_nodes)
+
+    # open nodes, as parallel arrays
+    open_inst = np.arange(num_boards)
+    open_f = heuristic(starts)
+    open_node = start_nodes
+
+    solution_node = np.full(num_boards, -1, dtype=np.int64)
+    while len(open_inst):
+        # drop nodes replaced by cheaper ones since they were opened
+        current = ~nodes.superseded[open_node]
+        open_inst, open_f, open_node = (
+            open_inst[current],
+            open_f[current],
+            open_node[current],
+        )
+        if len(open_inst) == 0:
+            break
+
+        # expand every open node whose f is the smallest of its board's
+        min_f = np.full(num_boards, np.iinfo(np.int64).max)
+        np.minimum.at(min_f, open_inst, open_f)
+        chosen = open_f == min_f[open_inst]
+        inst = open_inst[chosen]
+        node = open_node[chosen]
+        states = nodes.states[node]
+
+        at_goal = states == goal
+        solution_node[inst[at_goal]] = node[at_goal]
+        solved = solution_node >= 0
+
+        still_open = ~chosen & ~solved[open_inst]
+        open_inst = open_inst[still_open]
+        open_f = open_f[still_open]
+        open_node = open_node[still_open]
+
+        expand = ~solved[inst]
+        inst, node, states = inst[expand], node[expand], states[expand]
+        if len(inst) == 0:
+            continue
+
+        children = []
+        for s1, s2 in swaps:
+            x = ((states >> s1) ^ (states >> s2)) & mask
+            children.append(states ^ ((x << s1) | (x << s2)))
+        child_states = np.concatenate(children)
+        child_inst = np.tile(inst, len(swaps))
+        child_g = np.tile(nodes.g[node] + 1, len(swaps))
+        child_parent = np.tile(node, len(swaps))
+
+        # the cheapest child of each (board, state), if cheaper than any
+        # node already generated for it
+        by_g = np.lexsort((child_g, child_states, child_inst))
+        first = np.ones(len(by_g), dtype=bool)
+        first[1:] = (child_inst[by_g][1:] != child_inst[by_g][:-1]) | (
+            child_states[by_g][1:] != child_states[by_g][:-1]
+        )
+        kept = by_g[first]
+        previous = seen.lookup(child_inst[kept], child_states[kept])
+        known = previous >= 0
+        cheaper = ~known
+        cheaper[known] = child_g[kept[known]] < nodes.g[previous[known]]
+        nodes.superseded[previous[known & cheaper]] = True
+        kept = kept[cheaper]
+
+        child_states = child_states[kept]
+        child_nodes = nodes.add(child_states, child_g[kept], child_parent[kept])
+        seen.add(child_inst[kept], child_states, child_nodes)
+        open_inst = np.concatenate([open_inst, child_inst[kept]])
+        open_f = np.concatenate([open_f, child_g[kept] + heuristic(child_states)])
+        open_node = np.concatenate([open_node, child_nodes])
+
+    paths = []
+    for node in solution_node.tolist():
+        path = []
+        while node >= 0:
+            path.append(problem.unpack(int(nodes.states[node])))
+            node = int(nodes.parents[node])
+        paths.append(path[::-1])
+    return paths
@@ -0,0 +1,338 @@
+# Reproducible benchmarks of the searches in search.py.
+#
+# Every corpus of problems is generated from a seed, so two runs with the same
+# seed search exactly the same problems. Each algorithm is run on each problem
+# a few times untimed (warm-up), once instrumented with a SearchStats and
+# tracemalloc (expansions and peak memory), and then `repeat` times timed, so
+# that the instrumentation never skews the latencies. Results are written as
+# JSON so that runs on different commits can be compared:
+#
+#     python benchmark.py --output before.json
+#     (change something)
+#     python benchmark.py --output after.json --compare before.json
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from budget import BudgetedProblem
+from dgraph import DGraph, csr_from_edges
+from parallel import ALGORITHMS, HEURISTIC_ALGORITHMS, zero_heuristic
+from search import tilegame_astar, tilegame_heuristic
+from searchproblem import SearchProblem
+from searchstats import SearchStats
+from tilegameproblem import TileGame, TileGameState
+
+# A named list of problems to benchmark together
+Corpus = Tuple[str, List[SearchProblem]]
+
+
+def tilegame_corpus(
+    dim: int, depth: int, count: int, seed: int = 0
+) -> List[TileGameState]:
+    """
+    Produces count distinct boards of dimension dim whose shortest solution
+    is exactly depth moves, the same ones for the same seed.
+
+    Boards are made by random walks from the goal, and the length of each
+    board's shortest solution is found with tilegame_astar. Boards near the
+    largest depth possible are rare and slow to find: for 3x3 boards, keep
+    depth to about 13 (no board is more than 16 moves from the goal).
+    """
+    rng = np.random.default_rng([seed, dim, depth])
+    goal = TileGame(dim, rng=rng).goal_state
+    boards: List[TileGameState] = []
+    attempts = 0
+    while len(boards) < count:
+        attempts += 1
+        if attempts > 100 * count:
+            raise ValueError(f"could not find {count} boards at depth {depth}")
+        board, previous, distance = goal, None, 0
+        while distance < depth:
+            # the walk can only reach depth by taking at least depth - distance
+            # more steps, so take that many and measure again
+            for _ in range(depth - distance):
+                children = [
+                    child for child in TileGame(dim, board).get_successors(board)
+                    if child != previous
+                ]
+                previous = board
+                board = children[rng.integers(len(children))]
+            distance = len(tilegame_astar(TileGame(dim, board))) - 1
+        if board not in boards:
+            boards.append(board)
+    return boards
+
+
+def random_dgraph(
+    num_nodes: int,
+    out_degree: int,
+    seed: int = 0,
+    num_goals: int = 1,
+    max_cost: int = 10,
+) -> DGraph:
+    """
+    Produces a random sparse DGraph, the same one for the same arguments.
+    Every node has out_degree edges to nodes chosen uniformly at random (less
+    any duplicates), each with an integer cost from 1 to max_cost. The start
+    state is 0, and num_goals other nodes are goals.
+    """
+    rng = np.random.default_rng([seed, num_nodes, out_degree])
+    sources = np.repeat(np.arange(num_nodes), out_degree)
+    targets = rng.integers(num_nodes, size=len(sources))
+    costs = rng.integers(1, max_cost + 1, size=len(sources)).astype(np.float64)
+    goals = rng.choice(np.arange(1, num_nodes), num_goals, replace=False)
+    csr = csr_from_edges(num_nodes, sources, targets, costs)
+    return DGraph(None, set(goals.tolist()), 0, csr)
+
+
+def tilegame_suite(
+    seed: int = 0, dim: int = 3, depths: Sequence[int] = (6, 9, 12), count: int = 5
+) -> List[Corpus]:
+    """
+    One corpus of count boards for each solution depth in depths.
+    """
+    return [
+        (
+            f"tilegame-{dim}x{dim}-depth{depth}",
+            [TileGame(dim, board) for board in tilegame_corpus(dim, depth, count, seed)],
+        )
+        for depth in depths
+    ]
+
+
+def dgraph_suite(
+    seed: int = 0,
+    sizes: Sequence[int] = (1000, 10000),
+    out_degree: int = 4,
+    count: int = 5,
+) -> List[Corpus]:
+    """
+    One corpus of count random graphs (see random_dgraph) for each number of
+    nodes in sizes.
+    """
+    return [
+        (
+            f"dgraph-{size}-degree{out_degree}",
+            [random_dgraph(size, out_degree, seed + i) for i in range(count)],
+        )
+        for size in sizes
+    ]
+
+
+# name -> (the function producing the suite's corpora from a seed, the
+# algorithms run on it by default, the heuristic given to astar and idastar)
+SUITES: Dict[str, Tuple[Callable[[int], List[Corpus]], Tuple[str, ...], Callable]] = {
+    # bfs takes seconds per board at depth 9, and far longer under tracemalloc
+    "tilegame": (
+        tilegame_suite,
+        ("bidirectional_bfs", "astar", "tilegame_astar", "idastar", "tilegame_idastar"),
+        tilegame_heuristic,
+    ),
+    "dgraph": (
+        dgraph_suite,
+        ("bfs", "bidirectional_bfs", "astar", "ucs"),
+        zero_heuristic,
+    ),
+}
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """
+    Summarizes latencies, in seconds, by their mean and percentiles.
+    """
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]).tolist()
+    return {
+        "min": min(latencies),
+        "p50": p50,
+        "p90": p90,
+        "p99": p99,
+        "max": max(latencies),
+        "mean": sum(latencies) / len(latencies),
+    }
+
+
+def run_benchmark(
+    algorithm: str,
+    problems: List[SearchProblem],
+    heuristic: Callable = zero_heuristic,
+    warmup: int = 1,
+    repeat: int = 5,
+) -> Dict[str, Any]:
+    """
+    Benchmarks the search named algorithm (see parallel.ALGORITHMS) on every
+    problem in problems.
+
+    Output: a dictionary, ready for JSON, of the number of problems solved,
+    their mean path length, the total expansions, expansions per second
+    (total expansions over the sum of each problem's median latency), the
+    peak memory allocated during any one search, and the latencies of all
+    timed runs.
+    """
+    search_function = ALGORITHMS[algorithm]
+    args = (heuristic,) if algorithm in HEURISTIC_ALGORITHMS else ()
+    takes_stats = "stats" in inspect.signature(search_function).parameters
+
+    solved = 0
+    path_lengths = []
+    expansions = 0
+    peak_memory = 0
+    latencies = []
+    median_seconds = 0.0
+    for problem in problems:
+        for _ in range(warmup):
+            search_function(problem, *args)
+
+        tracemalloc.start()
+        if takes_stats:
+            stats = SearchStats()
+            path = search_function(problem, *args, stats=stats)
+            expansions += stats.expanded
+        else:
+            # counting through a wrapper would hide the problem's type from
+            # searches that special-case it, so only do so without stats
+            budgeted = BudgetedProblem(problem)
+            path = search_function(budgeted, *args)
+            expansions += budgeted.expansions
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        if path:
+            solved += 1
+            path_lengths.append(len(path))
+
+        problem_latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            search_function(problem, *args)
+            problem_latencies.append(time.perf_counter() - start)
+        latencies.extend(problem_latencies)
+        median_seconds += float(np.median(problem_latencies))
+
+    return {
+        "algorithm": algorithm,
+        "problems": len(problems),
+        "solved": solved,
+        "mean_path_length": sum(path_lengths) / len(path_lengths) if path_lengths else None,
+        "expansions": expansions,
+        "expansions_per_second": expansions / median_seconds if median_seconds else None,
+        "peak_memory_bytes": peak_memory,
+        "latency_seconds": latency_summary(latencies),
+    }
+
+
+def run_suites(
+    suites: Sequence[str],
+    seed: int = 0,
+    warmup: int = 1,
+    repeat: int = 5,
+    algorithms: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs run_benchmark for every algorithm on every corpus of the named
+    suites (see SUITES), using each suite's default algorithms unless
+    algorithms is given.
+    """
+    results = []
+    for suite in suites:
+        make_corpora, default_algorithms, heuristic = SUITES[suite]
+        for corpus, problems in make_corpora(seed):
+            for algorithm in algorithms or default_algorithms:
+                result = run_benchmark(algorithm, problems, heuristic, warmup, repeat)
+                results.append({"suite": suite, "corpus": corpus, **result})
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """
+    Produces the commit this file is checked out at, if it can be found.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(seed: int, warmup: int, repeat: int) -> Dict[str, Any]:
+    """
+    Describes the run, so that results from different runs can be told apart.
+    """
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+        "warmup": warmup,
+        "repeat": repeat,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """
+    Produces a line for every (corpus, algorithm) benchmarked in both runs,
+    giving the ratio of their median latencies (below 1 is faster now).
+    """
+    before = {
+        (result["corpus"], result["algorithm"]): result for result in baseline["results"]
+    }
+    lines = []
+    for result in current["results"]:
+        old = before.get((result["corpus"], result["algorithm"]))
+        if old is None:
+            continue
+        ratio = result["latency_seconds"]["p50"] / old["latency_seconds"]["p50"]
+        lines.append(f"{result['corpus']:<28} {result['algorithm']:<18} {ratio:6.2f}x")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Runs reproducible benchmarks of the searches in search.py,"
+        " optionally comparing the results with an earlier run."
+    )
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES))
+    parser.add_argument("--algorithm", action="append", choices=sorted(ALGORITHMS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a JSON file of results to compare with")
+    args = parser.parse_args(argv)
+
+    results = run_suites(
+        args.suite or sorted(SUITES), args.seed, args.warmup, args.repeat, args.algorithm
+    )
+    report = {"metadata": metadata(args.seed, args.warmup, args.repeat), "results": results}
+    for result in results:
+        print(
+            f"{result['corpus']:<28} {result['algorithm']:<18} "
+            f"p50 {result['latency_seconds']['p50'] * 1000:9.2f}ms  "
+            f"{result['expansions_per_second'] or 0:12.0f} exp/s  "
+            f"{result['peak_memory_bytes'] / 2**20:8.2f}MiB"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(json.load(f), report)))
+
+
+if __name__ == "__main__":
+    main()
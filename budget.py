@@ -0,0 +1,235 @@
+# Running searches within a budget of expansions, time and frontier size.
+#
+# The searches in search.py run until they finish. Rather than changing each
+# of them, run_search hands an algorithm a BudgetedProblem, which counts
+# expansions and watches the clock, and (for algorithms that take one) a
+# BudgetedFrontier, which watches its size. Either raises BudgetExceeded
+# inside the search, and run_search turns that into a SearchResult.
+
+import inspect
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from frontier import FifoFrontier, Frontier, LifoFrontier, PriorityFrontier
+import search
+from searchevents import GOAL, SearchEvent
+from searchproblem import SearchProblem, State
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised inside a search when a BudgetedProblem or BudgetedFrontier runs
+    out of its budget.
+    """
+
+
+class BudgetedProblem(SearchProblem[State]):
+    """
+    Wraps a SearchProblem, counting the states expanded through it and
+    raising BudgetExceeded once max_expansions or the deadline (a
+    time.monotonic() value) is passed. Any search can be stopped this way
+    without changing it, and without killing the process running it.
+
+    Other attributes are looked up on the wrapped problem, but searches that
+    special-case a problem type (e.g. bfs on a TileGame) will not recognise
+    the wrapper and use their general form instead. The searches made only
+    for the tile game (tilegame_astar, tilegame_idastar) expand through
+    to_packed and get_successors_with_delta, which are budgeted too.
+    """
+
+    def __init__(
+        self,
+        problem: SearchProblem[State],
+        max_expansions: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ):
+        self.problem = problem
+        self.max_expansions = max_expansions
+        self.deadline = deadline
+        self.expansions = 0
+        # the problem whose budget expansions count against: this one, or
+        # the one whose to_packed made it
+        self.__owner = self
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def get_start_state(self):
+        return self.problem.get_start_state()
+
+    def is_goal_state(self, state):
+        return self.problem.is_goal_state(state)
+
+    def get_successors(self, state):
+        self.__count()
+        return self.problem.get_successors(state)
+
+    def get_goal_states(self):
+        return self.problem.get_goal_states()
+
+    def get_predecessors(self, state):
+        self.__count()
+        return self.problem.get_predecessors(state)
+
+    def get_successors_with_delta(self, state):
+        self.__count()
+        return self.problem.get_successors_with_delta(state)
+
+    def to_packed(self) -> "BudgetedProblem":
+        """
+        Produces the packed form of the wrapped problem, wrapped so that its
+        expansions count against this problem's budget.
+        """
+        packed = BudgetedProblem(
+            self.problem.to_packed(), self.max_expansions, self.deadline
+        )
+        packed.__owner = self.__owner
+        return packed
+
+    def __count(self):
+        owner = self.__owner
+        owner.expansions += 1
+        if self.max_expansions is not None and owner.expansions > self.max_expansions:
+            raise BudgetExceeded(f"more than {self.max_expansions} expansions")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded("out of time")
+
+
+class BudgetedFrontier(Frontier):
+    """
+    Wraps a Frontier, recording the most items it has held at once and
+    raising BudgetExceeded if that would go over max_size.
+    """
+
+    def __init__(self, frontier: Frontier, max_size: Optional[int] = None):
+        self.frontier = frontier
+        self.max_size = max_size
+        self.peak = 0
+
+    def put(self, item):
+        self.frontier.put(item)
+        size = len(self.frontier)
+        if size > self.peak:
+            self.peak = size
+            if self.max_size is not None and size > self.max_size:
+                raise BudgetExceeded(f"more than {self.max_size} states in the frontier")
+
+    def get(self):
+        return self.frontier.get()
+
+    def empty(self) -> bool:
+        return self.frontier.empty()
+
+    def __len__(self) -> int:
+        return len(self.frontier)
+
+
+class Budget(NamedTuple):
+    """
+    Limits on a search; None means no limit.
+
+    max_expansions - the most states to expand
+    max_seconds - the most wall-clock time to take
+    max_frontier - the most states to hold in the frontier at once. Only
+                   algorithms that take a frontier have one to limit;
+                   run_search raises ValueError for the others.
+    """
+
+    max_expansions: Optional[int] = None
+    max_seconds: Optional[float] = None
+    max_frontier: Optional[int] = None
+
+
+class SearchResult(NamedTuple):
+    """
+    The outcome of run_search.
+
+    status - "solved" if the search finished with a path, "no_solution" if
+             it finished without one, or "budget_exceeded" if it was stopped
+    path - the path found, or for an anytime search stopped early, the best
+           path found before it was stopped; [] if there is none
+    expansions - the number of states expanded
+    peak_frontier - the most states held in the frontier at once, or -1 if
+                    the algorithm takes no frontier
+    seconds - the wall-clock time taken
+    reason - why the search was stopped, if it was
+    """
+
+    status: str
+    path: List[Any]
+    expansions: int
+    peak_frontier: int
+    seconds: float
+    reason: Optional[str] = None
+
+
+# The frontier each algorithm that takes one uses by default
+DEFAULT_FRONTIERS: Dict[Callable, Callable[[], Frontier]] = {
+    search.bfs: FifoFrontier,
+    search.dfs: LifoFrontier,
+    search.astar: PriorityFrontier,
+    search.anytime_astar: PriorityFrontier,
+    search.tilegame_astar: PriorityFrontier,
+}
+
+
+def run_search(
+    algorithm: Callable,
+    problem: SearchProblem[State],
+    *args,
+    budget: Budget = Budget(),
+    **kwargs,
+) -> SearchResult:
+    """
+    Runs algorithm(problem, *args, **kwargs) within budget.
+
+    algorithm is any search from search.py (or one with the same calling
+    convention). Anytime searches such as anytime_astar, which produce an
+    iterator of ever better paths, are run until they finish or the budget
+    runs out, and the best path so far is kept either way. Generator
+    searches such as iter_bfs, which produce SearchEvents, are run the same
+    way, keeping the path of their GOAL event and ignoring the rest.
+
+    The frontier given as the frontier keyword argument, or else the one in
+    DEFAULT_FRONTIERS, is the one limited by budget.max_frontier. A limit on
+    the frontier of an algorithm with neither raises ValueError rather than
+    going unenforced.
+    """
+    frontier = None
+    if kwargs.get("frontier") is not None:
+        frontier = BudgetedFrontier(kwargs["frontier"], budget.max_frontier)
+    elif algorithm in DEFAULT_FRONTIERS:
+        frontier = BudgetedFrontier(DEFAULT_FRONTIERS[algorithm](), budget.max_frontier)
+    elif budget.max_frontier is not None:
+        name = getattr(algorithm, "__name__", repr(algorithm))
+        raise ValueError(f"{name} takes no frontier for max_frontier to limit")
+    if frontier is not None:
+        kwargs["frontier"] = frontier
+
+    start = time.monotonic()
+    deadline = None if budget.max_seconds is None else start + budget.max_seconds
+    problem = BudgetedProblem(problem, budget.max_expansions, deadline)
+
+    path = []
+    reason = None
+    try:
+        if inspect.isgeneratorfunction(algorithm):
+            for item in algorithm(problem, *args, **kwargs):
+                if not isinstance(item, SearchEvent):
+                    path = item
+                elif item.kind == GOAL:
+                    path = list(item.path)
+        else:
+            path = algorithm(problem, *args, **kwargs)
+        status = "solved" if path else "no_solution"
+    except BudgetExceeded as e:
+        status, reason = "budget_exceeded", str(e)
+
+    return SearchResult(
+        status,
+        path,
+        problem.expansions,
+        -1 if frontier is None else frontier.peak,
+        time.monotonic() - start,
+        reason,
+    )
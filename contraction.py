@@ -0,0 +1,337 @@
+# Contraction hierarchies (CH) for fast queries on large, static DGraphs.
+#
+# Preprocessing contracts the nodes one at a time, least important first:
+# contracting v removes it from the graph, and for every path u -> v -> w
+# that is the only shortest path from u to w left (no "witness" path avoids
+# v), it adds a shortcut edge u -> w of the same cost. A node's rank is when
+# it was contracted; every edge of the graph, original or shortcut, leads
+# either up to a higher rank or down to a lower one.
+#
+# Some shortest path from s to t then always climbs from s and descends to t,
+# so a query is a bidirectional Dijkstra search that only follows upward
+# edges: forward from s, and backward from t along edges that descend to it.
+# Both searches stay near the top of the hierarchy and settle few nodes. A
+# shortcut remembers the node it skipped, its middle, so the path found is
+# unpacked into edges of the original graph.
+#
+# Edge costs must not be negative.
+
+import heapq
+import math
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from dgraph import CSR, DGraph
+
+# The middle of an edge that is not a shortcut
+NO_MIDDLE = -1
+
+
+def upward_csr(
+    num_nodes: int, edges: List[Tuple[int, int, float, int]]
+) -> Tuple[CSR, np.ndarray]:
+    """
+    Produces the CSR form of the (source, target, cost, middle) edges, and
+    the middle of each edge, in the same order as targets and costs.
+    """
+    sources = np.array([edge[0] for edge in edges], dtype=np.int64)
+    order = np.argsort(sources, kind="stable")
+    targets = np.array([edge[1] for edge in edges], dtype=np.int64)[order]
+    costs = np.array([edge[2] for edge in edges], dtype=np.float64)[order]
+    middles = np.array([edge[3] for edge in edges], dtype=np.int64)[order]
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=offsets[1:])
+    return (offsets, targets, costs), middles
+
+
+class ContractionHierarchy:
+    """
+    A DGraph preprocessed into a contraction hierarchy (see build), which
+    answers shortest-path queries (see query) by searching only a small part
+    of the graph.
+
+    rank[v] is the order in which node v was contracted. up holds, at each
+    node v, the edges v -> w with rank[w] > rank[v]; down holds, at each node
+    v, the edges u -> v with rank[u] > rank[v], as edges from v to u. Both are
+    CSRs, with up_middles and down_middles giving the middle of each edge, or
+    NO_MIDDLE.
+    """
+
+    def __init__(
+        self,
+        rank: np.ndarray,
+        up: CSR,
+        up_middles: np.ndarray,
+        down: CSR,
+        down_middles: np.ndarray,
+    ):
+        self.rank = rank
+        self.up = up
+        self.up_middles = up_middles
+        self.down = down
+        self.down_middles = down_middles
+        # the query walks these edge by edge, which plain lists do fastest
+        self.__up = [array.tolist() for array in (*up, up_middles)]
+        self.__down = [array.tolist() for array in (*down, down_middles)]
+        self.__rank = rank.tolist()
+
+    @staticmethod
+    def build(graph: DGraph, max_settled: int = 500) -> "ContractionHierarchy":
+        """
+        Contracts every node of graph, choosing each time the node whose
+        contraction adds the fewest shortcuts for the edges it removes, with
+        a penalty for neighbours already contracted so that contraction
+        spreads evenly over the graph.
+
+        max_settled - the most nodes a witness search settles before giving
+                      up and adding the shortcut anyway. Lower is faster, and
+                      adds more shortcuts than are needed.
+        """
+        num_nodes = graph.num_nodes
+        out_edges: List[Dict[int, float]] = [{} for _ in range(num_nodes)]
+        in_edges: List[Dict[int, float]] = [{} for _ in range(num_nodes)]
+        offsets = graph.offsets.tolist()
+        targets, costs = graph.targets.tolist(), graph.costs.tolist()
+        for source in range(num_nodes):
+            for i in range(offsets[source], offsets[source + 1]):
+                if targets[i] != source:
+                    out_edges[source][targets[i]] = costs[i]
+                    in_edges[targets[i]][source] = costs[i]
+        # (u, w) -> the node the shortcut u -> w skips
+        middles: Dict[Tuple[int, int], int] = {}
+        contracted_neighbours = [0] * num_nodes
+
+        def shortcuts(node: int) -> List[Tuple[int, int, float]]:
+            # the shortcuts contracting node would add, as (u, w, cost)
+            found = []
+            outs = out_edges[node]
+            if not outs:
+                return found
+            longest_out = max(outs.values())
+            for u, cost_in in in_edges[node].items():
+                distances = witness_search(
+                    u, node, cost_in + longest_out, out_edges, max_settled
+                )
+                for w, cost_out in outs.items():
+                    cost = cost_in + cost_out
+                    if w != u and distances.get(w, math.inf) > cost:
+                        found.append((u, w, cost))
+            return found
+
+        def priority(node: int, added: int) -> int:
+            removed = len(in_edges[node]) + len(out_edges[node])
+            return added - removed + contracted_neighbours[node]
+
+        heap = [(priority(v, len(shortcuts(v))), v) for v in range(num_nodes)]
+        heapq.heapify(heap)
+        rank = np.zeros(num_nodes, dtype=np.int64)
+        up_edges: List[Tuple[int, int, float, int]] = []
+        down_edges: List[Tuple[int, int, float, int]] = []
+        for order in range(num_nodes):
+            # priorities in the heap go stale as the graph changes, so
+            # recompute the best one's before contracting it (lazy updates)
+            while True:
+                _, node = heapq.heappop(heap)
+                added = shortcuts(node)
+                current = priority(node, len(added))
+                if not heap or current <= heap[0][0]:
+                    break
+                heapq.heappush(heap, (current, node))
+
+            rank[node] = order
+            for w, cost in out_edges[node].items():
+                up_edges.append((node, w, cost, middles.pop((node, w), NO_MIDDLE)))
+                del in_edges[w][node]
+                contracted_neighbours[w] += 1
+            for u, cost in in_edges[node].items():
+                down_edges.append((node, u, cost, middles.pop((u, node), NO_MIDDLE)))
+                del out_edges[u][node]
+                contracted_neighbours[u] += 1
+            out_edges[node], in_edges[node] = {}, {}
+            for u, w, cost in added:
+                if cost < out_edges[u].get(w, math.inf):
+                    out_edges[u][w] = cost
+                    in_edges[w][u] = cost
+                    middles[(u, w)] = node
+
+        up, up_middles = upward_csr(num_nodes, up_edges)
+        down, down_middles = upward_csr(num_nodes, down_edges)
+        return ContractionHierarchy(rank, up, up_middles, down, down_middles)
+
+    def save(self, path: str):
+        """
+        Writes the hierarchy to path as an .npz file, for load.
+        """
+        np.savez(
+            path,
+            rank=self.rank,
+            up_offsets=self.up[0],
+            up_targets=self.up[1],
+            up_costs=self.up[2],
+            up_middles=self.up_middles,
+            down_offsets=self.down[0],
+            down_targets=self.down[1],
+            down_costs=self.down[2],
+            down_middles=self.down_middles,
+        )
+
+    @staticmethod
+    def load(path: str) -> "ContractionHierarchy":
+        """
+        Reads a hierarchy written by save.
+        """
+        with np.load(path) as arrays:
+            up = (arrays["up_offsets"], arrays["up_targets"], arrays["up_costs"])
+            down = (
+                arrays["down_offsets"],
+                arrays["down_targets"],
+                arrays["down_costs"],
+            )
+            return ContractionHierarchy(
+                arrays["rank"], up, arrays["up_middles"], down, arrays["down_middles"]
+            )
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.rank)
+
+    @property
+    def num_shortcuts(self) -> int:
+        return int((self.up_middles != NO_MIDDLE).sum()) + int(
+            (self.down_middles != NO_MIDDLE).sum()
+        )
+
+    def query(self, start: int, goals: Iterable[int]) -> List[int]:
+        """
+        Finds the cheapest path from start to any node in goals.
+
+        Input:
+            start - the node to start from
+            goals - the nodes to reach any of
+
+        Output: a list of nodes representing the path of the solution, as
+        astar produces on the original graph, or [] if no goal can be reached
+
+        """
+        up_offsets, up_targets, up_costs, _ = self.__up
+        down_offsets, down_targets, down_costs, _ = self.__down
+        # the two searches: forward from start up the up edges, and backward
+        # from every goal up the down edges
+        forward = {start: 0.0}
+        backward = {goal: 0.0 for goal in goals}
+        forward_parents = {start: -1}
+        backward_parents = {goal: -1 for goal in backward}
+        frontiers = ([(0.0, start)], [(0.0, goal) for goal in backward])
+        searches = (
+            (forward, forward_parents, up_offsets, up_targets, up_costs, backward),
+            (
+                backward,
+                backward_parents,
+                down_offsets,
+                down_targets,
+                down_costs,
+                forward,
+            ),
+        )
+        best, meeting = math.inf, -1
+        if start in backward:
+            best, meeting = 0.0, start
+
+        side = 0
+        # each search stops once it cannot improve on the best path so far
+        while (frontiers[0] and frontiers[0][0][0] < best) or (
+            frontiers[1] and frontiers[1][0][0] < best
+        ):
+            if not (frontiers[side] and frontiers[side][0][0] < best):
+                side = 1 - side
+            frontier = frontiers[side]
+            distances, parents, offsets, targets, costs, other = searches[side]
+            distance, node = heapq.heappop(frontier)
+            if distance > distances[node]:
+                continue
+            for i in range(offsets[node], offsets[node + 1]):
+                target = targets[i]
+                target_distance = distance + costs[i]
+                if target_distance < distances.get(target, math.inf):
+                    distances[target] = target_distance
+                    parents[target] = node
+                    heapq.heappush(frontier, (target_distance, target))
+                    if target in other and target_distance + other[target] < best:
+                        best, meeting = target_distance + other[target], target
+            side = 1 - side
+
+        if meeting == -1:
+            return []
+        path = [meeting]
+        node = meeting
+        while forward_parents[node] != -1:
+            parent = forward_parents[node]
+            path.extend(self.__unpack(parent, node)[-2::-1])
+            node = parent
+        path.reverse()
+        node = meeting
+        while backward_parents[node] != -1:
+            child = backward_parents[node]
+            path.extend(self.__unpack(node, child)[1:])
+            node = child
+        return path
+
+    def __unpack(self, source: int, target: int) -> List[int]:
+        """
+        Produces the nodes of the original graph along the edge from source
+        to target, both included.
+        """
+        up_offsets, up_targets, _, up_middles = self.__up
+        down_offsets, down_targets, _, down_middles = self.__down
+        rank = self.__rank
+        path = [source]
+        edges = [(source, target)]
+        while edges:
+            source, target = edges.pop()
+            # the edge is stored at whichever end has the lower rank
+            if rank[source] < rank[target]:
+                lo, hi = up_offsets[source], up_offsets[source + 1]
+                middle = up_middles[up_targets.index(target, lo, hi)]
+            else:
+                lo, hi = down_offsets[target], down_offsets[target + 1]
+                middle = down_middles[down_targets.index(source, lo, hi)]
+            if middle == NO_MIDDLE:
+                path.append(target)
+            else:
+                edges.append((middle, target))
+                edges.append((source, middle))
+        return path
+
+
+def witness_search(
+    source: int,
+    avoid: int,
+    max_cost: float,
+    out_edges: List[Dict[int, float]],
+    max_settled: int,
+) -> Dict[int, float]:
+    """
+    Dijkstra's algorithm from source over out_edges, never entering avoid,
+    and stopping at paths costing more than max_cost or after settling
+    max_settled nodes.
+
+    Output: the cost of the cheapest path found to each node reached; a node
+    not settled may have a cheaper path that was not found
+    """
+    distances = {source: 0.0}
+    heap = [(0.0, source)]
+    settled = 0
+    while heap and settled < max_settled:
+        distance, node = heapq.heappop(heap)
+        if distance > distances[node]:
+            continue
+        if distance > max_cost:
+            break
+        settled += 1
+        for target, cost in out_edges[node].items():
+            target_distance = distance + cost
+            if target != avoid and target_distance < distances.get(target, math.inf):
+                distances[target] = target_distance
+                heapq.heappush(heap, (target_distance, target))
+    return distances
@@ -1,16 +1,123 @@
-# A matrix representation of a directed graph.
+# A directed graph, given as an adjacency matrix or as compressed sparse rows.
 # This is for your testing.
 # Read the assignment handout for details.
 
-from typing import List, Optional, Set
+import struct
+from typing import Iterable, List, Optional, Set, Tuple
+
+import numpy as np
 
 from searchproblem import SearchProblem
 
+# The compressed sparse row (CSR) form of a graph with n nodes: the edges out
+# of node i are at positions offsets[i] to offsets[i + 1] - 1 of targets
+# (their heads) and costs (their costs). offsets has n + 1 entries.
+CSR = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# The graph file format: a header of MAGIC followed by the number of nodes n
+# and of edges m as little-endian uint64s, then offsets (n + 1 int64s),
+# targets (m int64s) and costs (m float64s), all little-endian. Every array
+# starts at a multiple of 8 bytes, so each can be memory-mapped in place.
+MAGIC = b"DGRAPH01"
+HEADER = struct.Struct("<8sQQ")
+
+
+def csr_from_edges(
+    num_nodes: int, sources: np.ndarray, targets: np.ndarray, costs: np.ndarray
+) -> CSR:
+    """
+    Produces the CSR form of the graph with num_nodes nodes and an edge from
+    sources[i] to targets[i] costing costs[i] for every i. Of several edges
+    between the same two nodes, only the cheapest is kept.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    costs = np.asarray(costs, dtype=np.float64)
+    if len(sources) and (
+        min(sources.min(), targets.min()) < 0
+        or max(sources.max(), targets.max()) >= num_nodes
+    ):
+        raise ValueError(f"edges must be between nodes 0 to {num_nodes - 1}")
+
+    # sorted by source, then target, then cost, so the first of each run of
+    # parallel edges is the cheapest
+    order = np.lexsort((costs, targets, sources))
+    sources, targets, costs = sources[order], targets[order], costs[order]
+    first = np.ones(len(sources), dtype=bool)
+    first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    sources, targets, costs = sources[first], targets[first], costs[first]
+
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=offsets[1:])
+    return offsets, targets, costs
+
+
+def write_graph_file(path: str, csr: CSR):
+    """
+    Writes the CSR arrays, csr, to path in the graph file format.
+    """
+    offsets, targets, costs = csr
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(offsets) - 1, len(targets)))
+        np.asarray(offsets, dtype="<i8").tofile(f)
+        np.asarray(targets, dtype="<i8").tofile(f)
+        np.asarray(costs, dtype="<f8").tofile(f)
+
+
+def read_graph_file(path: str) -> CSR:
+    """
+    Memory-maps the CSR arrays stored at path in the graph file format. The
+    arrays are read-only views of the file, so nothing is copied and every
+    process mapping the same file shares its pages.
+    """
+    with open(path, "rb") as f:
+        magic, num_nodes, num_edges = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a graph file")
+    offset = HEADER.size
+    offsets = np.memmap(path, "<i8", "r", offset, (num_nodes + 1,))
+    if num_edges == 0:
+        # there is nothing after the offsets to map
+        return offsets, np.zeros(0, "<i8"), np.zeros(0, "<f8")
+    offset += 8 * (num_nodes + 1)
+    targets = np.memmap(path, "<i8", "r", offset, (num_edges,))
+    offset += 8 * num_edges
+    costs = np.memmap(path, "<f8", "r", offset, (num_edges,))
+    return offsets, targets, costs
+
+
+def read_edge_list(path: str, num_nodes: Optional[int] = None) -> CSR:
+    """
+    Reads a text file with one edge per line, as "source target" or
+    "source target cost" separated by whitespace, and produces its CSR form.
+    Edges without a cost cost 1, and lines starting with # are ignored.
+    There are max node + 1 nodes unless num_nodes says otherwise.
+    """
+    edges = np.loadtxt(path, comments="#", ndmin=2)
+    if edges.size == 0:
+        edges = np.zeros((0, 3))
+    sources = edges[:, 0].astype(np.int64)
+    targets = edges[:, 1].astype(np.int64)
+    costs = edges[:, 2] if edges.shape[1] > 2 else np.ones(len(edges))
+    if num_nodes is None:
+        num_nodes = int(max(sources.max(), targets.max())) + 1 if len(edges) else 0
+    return csr_from_edges(num_nodes, sources, targets, costs)
+
+
+def convert_edge_list(edge_list_path: str, graph_path: str):
+    """
+    Converts the edge list text file at edge_list_path (see read_edge_list)
+    to a graph file at graph_path.
+    """
+    write_graph_file(graph_path, read_edge_list(edge_list_path))
+
 
 class DGraph(SearchProblem[int]):
     """
-    DGraph holds an adjacency matrix, which represents a directed graph. See the handout for more
-    information on adjacency matrices.
+    DGraph holds a directed graph in compressed sparse row (CSR) form, so that
+    the successors of a node are found in time proportional to its number of
+    edges and memory is proportional to the number of edges. See the handout
+    for more information on adjacency matrices, which DGraph can be built from.
 
     DGraph implements the SearchProblem Abstract Base Class. A state in DGraph is just an integer
     representing a node in the graph.
@@ -18,21 +125,79 @@ class DGraph(SearchProblem[int]):
 
     def __init__(
         self,
-        matrix: List[List[Optional[float]]],
+        matrix: Optional[List[List[Optional[float]]]],
         goal_indices: Set[int],
         start_state: int = 0,
+        csr: Optional[CSR] = None,
     ):
         """
-        matrix - the matrix representation of the directed graph
+        matrix - the matrix representation of the directed graph, or None if
+                 csr is given. It is only read when the DGraph is built.
 
         goal_indices - a Python set of the indices of the states
                        that are goal states.
 
         start_state - the index of the start state. 0 by default.
+
+        csr - the (offsets, targets, costs) arrays of the graph, to use
+              instead of matrix.
         """
         self.matrix = matrix
         self.goal_indices = goal_indices
         self.start_state = start_state
+        if csr is None:
+            sources, targets, costs = [], [], []
+            for source, row in enumerate(matrix):
+                for target, cost in enumerate(row):
+                    if not (cost == None):
+                        sources.append(source)
+                        targets.append(target)
+                        costs.append(cost)
+            csr = csr_from_edges(len(matrix), sources, targets, costs)
+        self.offsets, self.targets, self.costs = csr
+        self.__reverse = None
+
+    @staticmethod
+    def from_edges(
+        num_nodes: int,
+        edges: Iterable[Tuple[int, int, float]],
+        goal_indices: Set[int],
+        start_state: int = 0,
+    ) -> "DGraph":
+        """
+        Builds the DGraph with num_nodes nodes and the given (source, target,
+        cost) edges, without ever building its adjacency matrix.
+        """
+        edges = list(edges)
+        sources = [source for source, _, _ in edges]
+        targets = [target for _, target, _ in edges]
+        costs = [cost for _, _, cost in edges]
+        csr = csr_from_edges(num_nodes, sources, targets, costs)
+        return DGraph(None, goal_indices, start_state, csr)
+
+    @staticmethod
+    def from_file(
+        path: str, goal_indices: Set[int], start_state: int = 0
+    ) -> "DGraph":
+        """
+        Builds the DGraph stored in the graph file at path, memory-mapping its
+        arrays rather than reading them (see read_graph_file).
+        """
+        return DGraph(None, goal_indices, start_state, read_graph_file(path))
+
+    def save(self, path: str):
+        """
+        Writes the graph to path in the graph file format, for from_file.
+        """
+        write_graph_file(path, (self.offsets, self.targets, self.costs))
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
 
     def get_start_state(self):
         return self.start_state
@@ -41,11 +206,27 @@ class DGraph(SearchProblem[int]):
         return state in self.goal_indices
 
     def get_successors(self, state):
-        row = self.matrix[state]
-        successors = {}
-        index = 0
-        for cost in row:
-            if not (cost == None):
-                successors[index] = cost
-            index += 1
-        return successors
+        lo = self.offsets[state]
+        hi = self.offsets[state + 1]
+        return dict(zip(self.targets[lo:hi].tolist(), self.costs[lo:hi].tolist()))
+
+    def get_goal_states(self):
+        return list(self.goal_indices)
+
+    def get_predecessors(self, state):
+        offsets, sources, costs = self.reverse_csr()
+        lo = offsets[state]
+        hi = offsets[state + 1]
+        return dict(zip(sources[lo:hi].tolist(), costs[lo:hi].tolist()))
+
+    def reverse_csr(self) -> CSR:
+        """
+        Produces the CSR form of the graph with every edge reversed, building
+        it the first time it is needed.
+        """
+        if self.__reverse is None:
+            sources = np.repeat(np.arange(self.num_nodes), np.diff(self.offsets))
+            self.__reverse = csr_from_edges(
+                self.num_nodes, self.targets, sources, self.costs
+            )
+        return self.__reverse
@@ -0,0 +1,159 @@
+# Frontier data structures for the algorithms in search.py.
+#
+# Search is single-threaded, so these skip the lock and condition variable
+# that queue.Queue, LifoQueue and PriorityQueue acquire on every put and get.
+# They expose the same put/get/empty methods, so a thread-safe queue from
+# the queue module can still be passed in explicitly wherever a Frontier is
+# accepted.
+
+from abc import ABC, abstractmethod
+from collections import deque
+import heapq
+import itertools
+from typing import Any, Deque, Generic, List, Tuple, TypeVar
+
+Item = TypeVar("Item")
+
+
+class Frontier(ABC, Generic[Item]):
+    """
+    The interface shared by all frontiers: put adds an item, get removes
+    and produces the next item, and empty says whether there is nothing left
+    to get.
+    """
+
+    @abstractmethod
+    def put(self, item: Item) -> None:
+        pass
+
+    @abstractmethod
+    def get(self) -> Item:
+        pass
+
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class FifoFrontier(Frontier[Item]):
+    """
+    A first-in first-out frontier backed by a deque, for breadth-first search.
+    """
+
+    def __init__(self):
+        self.items: Deque[Item] = deque()
+
+    def put(self, item: Item) -> None:
+        self.items.append(item)
+
+    def get(self) -> Item:
+        return self.items.popleft()
+
+    def empty(self) -> bool:
+        return not self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class LifoFrontier(Frontier[Item]):
+    """
+    A last-in first-out frontier backed by a deque, for depth-first search.
+    """
+
+    def __init__(self):
+        self.items: Deque[Item] = deque()
+
+    def put(self, item: Item) -> None:
+        self.items.append(item)
+
+    def get(self) -> Item:
+        return self.items.pop()
+
+    def empty(self) -> bool:
+        return not self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class PriorityFrontier(Frontier[Tuple[Any, Item]]):
+    """
+    A min-priority frontier backed by heapq.
+
+    Like PriorityQueue, items are (priority, value) pairs and get produces
+    the pair with the smallest priority. Ties between equal priorities are
+    broken by insertion order, so values never need to be comparable.
+    """
+
+    def __init__(self):
+        self.heap: List[Tuple[Any, int, Item]] = []
+        self.counter = itertools.count()
+
+    def put(self, item: Tuple[Any, Item]) -> None:
+        priority, value = item
+        heapq.heappush(self.heap, (priority, next(self.counter), value))
+
+    def get(self) -> Tuple[Any, Item]:
+        priority, _, value = heapq.heappop(self.heap)
+        return priority, value
+
+    def empty(self) -> bool:
+        return not self.heap
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+class RadixFrontier(Frontier[Tuple[int, Item]]):
+    """
+    A min-priority frontier for non-negative integer priorities that never
+    go below the last one produced by get, as in uniform-cost search with
+    integer costs. Backed by a radix heap: an item is kept in the bucket of
+    the highest bit in which its priority differs from the last one got, so
+    put is O(1) and get is O(log C) amortized, C being the largest priority.
+
+    Like PriorityFrontier, items are (priority, value) pairs, and values
+    never need to be comparable. Ties are produced in no particular order.
+    """
+
+    def __init__(self):
+        self.buckets: List[List[Tuple[int, Item]]] = [[]]
+        self.last = 0
+        self.size = 0
+
+    def put(self, item: Tuple[int, Item]) -> None:
+        priority = item[0]
+        if priority < self.last:
+            raise ValueError(
+                f"priority {priority} is below the last one got, {self.last}"
+            )
+        bucket = (priority ^ self.last).bit_length()
+        while bucket >= len(self.buckets):
+            self.buckets.append([])
+        self.buckets[bucket].append(item)
+        self.size += 1
+
+    def get(self) -> Tuple[int, Item]:
+        buckets = self.buckets
+        if not buckets[0]:
+            # every item of the first nonempty bucket moves to a lower one,
+            # relative to the smallest priority among them
+            i = 1
+            while not buckets[i]:
+                i += 1
+            items, buckets[i] = buckets[i], []
+            last = self.last = min(priority for priority, _ in items)
+            for item in items:
+                buckets[(item[0] ^ last).bit_length()].append(item)
+        self.size -= 1
+        return buckets[0].pop()
+
+    def empty(self) -> bool:
+        return self.size == 0
+
+    def __len__(self) -> int:
+        return self.size
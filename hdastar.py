@@ -0,0 +1,272 @@
+# Hash-distributed A* (HDA*): one hard search spread over several processes.
+#
+# Every state is owned by the worker partition(state) % workers, stable_hash
+# by default: Python's own hash of a str or bytes is salted differently in
+# each process not forked from the caller, so workers would disagree on who
+# owns a state and fail to notice duplicates. A worker keeps
+# the open list, best costs and parents of the states it owns, expands them
+# in order of f = g + h, and sends each child it generates to the child's
+# owner, batching the children bound for each worker. Whenever a worker
+# expands a goal state it reports the goal's cost to the coordinator, which
+# broadcasts the cheapest one so far (the incumbent) so workers can ignore
+# anything that cannot beat it.
+#
+# Workers do not expand states in a single global order, so the first goal
+# found need not be the cheapest. The search is over only once every worker
+# has run out of states with f below the incumbent and no batch of children
+# is still on its way. The coordinator checks this by asking all workers,
+# once idle, how many batches they have sent and received; two rounds of
+# identical, balanced counts mean nothing happened in between.
+
+import hashlib
+import heapq
+import itertools
+import math
+import multiprocessing
+import queue
+from typing import Callable, Dict, List, Optional
+
+from searchproblem import SearchProblem, State
+
+# Messages to workers
+NODES = "nodes"  # (NODES, [(g, state, parent), ...])
+INCUMBENT = "incumbent"  # (INCUMBENT, cost)
+PROBE = "probe"  # (PROBE,)
+PARENT = "parent"  # (PARENT, state)
+STOP = "stop"  # (STOP,)
+
+# Messages to the coordinator
+GOAL = "goal"  # (GOAL, cost, state, worker)
+COUNTS = "counts"  # (COUNTS, worker, batches sent, batches received)
+PARENT_OF = "parent_of"  # (PARENT_OF, parent or None, parent's owner)
+
+# Expansions between checks of the inbox
+BATCH_SIZE = 64
+
+
+def stable_hash(state) -> int:
+    """
+    Produces a hash of state that is the same in every process: a digest of
+    repr(state), so states that are equal must have equal reprs (as tuples
+    of ints, ints and strings do).
+    """
+    digest = hashlib.blake2b(repr(state).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def hda_worker(
+    index: int,
+    problem: SearchProblem[State],
+    heur: Callable[[State], float],
+    inboxes: List[multiprocessing.Queue],
+    results: multiprocessing.Queue,
+    partition: Callable[[State], int] = stable_hash,
+):
+    """
+    The loop run by worker index: receive states, expand the ones it owns,
+    and answer the coordinator.
+    """
+    workers = len(inboxes)
+    inbox = inboxes[index]
+    open_list = []
+    counter = itertools.count()
+    best_g: Dict[State, float] = {}
+    parent: Dict[State, Optional[State]] = {}
+    closed = set()
+    incumbent = math.inf
+    sent = received = 0
+    probed = False
+
+    def add(g, state, state_parent):
+        if g < best_g.get(state, math.inf):
+            best_g[state] = g
+            parent[state] = state_parent
+            closed.discard(state)
+            f = g + heur(state)
+            heapq.heappush(open_list, (f, -g, next(counter), state))
+
+    def handle(message) -> bool:
+        nonlocal incumbent, probed, sent, received
+        kind = message[0]
+        if kind == NODES:
+            received += 1
+            foreign = [[] for _ in range(workers)]
+            for g, state, state_parent in message[1]:
+                owner = partition(state) % workers
+                if owner == index:
+                    add(g, state, state_parent)
+                else:
+                    foreign[owner].append((g, state, state_parent))
+            for owner, nodes in enumerate(foreign):
+                if nodes:
+                    inboxes[owner].put((NODES, nodes))
+                    sent += 1
+        elif kind == INCUMBENT:
+            incumbent = min(incumbent, message[1])
+        elif kind == PROBE:
+            probed = True
+        elif kind == PARENT:
+            state_parent = parent[message[1]]
+            owner = None if state_parent is None else partition(state_parent) % workers
+            results.put((PARENT_OF, state_parent, owner))
+        elif kind == STOP:
+            # nobody reads the inboxes any more, so don't wait to flush them
+            for other in inboxes:
+                other.cancel_join_thread()
+            return False
+        return True
+
+    def has_work() -> bool:
+        if open_list and open_list[0][0] >= incumbent:
+            # the cheapest open state cannot beat the incumbent; nor can the rest
+            open_list.clear()
+        return bool(open_list)
+
+    while True:
+        # take everything waiting, blocking only when there is nothing to do
+        try:
+            while True:
+                if has_work():
+                    message = inbox.get_nowait()
+                else:
+                    if probed:
+                        results.put((COUNTS, index, sent, received))
+                        probed = False
+                    message = inbox.get()
+                if not handle(message):
+                    return
+        except queue.Empty:
+            pass
+
+        outgoing = [[] for _ in range(workers)]
+        for _ in range(BATCH_SIZE):
+            if not has_work():
+                break
+            f, neg_g, _, state = heapq.heappop(open_list)
+            g = -neg_g
+            if g > best_g[state] or state in closed:
+                continue
+            if problem.is_goal_state(state):
+                if g < incumbent:
+                    incumbent = g
+                    results.put((GOAL, g, state, index))
+                continue
+            closed.add(state)
+            for child_state, cost in problem.get_successors(state).items():
+                owner = partition(child_state) % workers
+                outgoing[owner].append((g + cost, child_state, state))
+
+        for owner, nodes in enumerate(outgoing):
+            if not nodes:
+                continue
+            if owner == index:
+                for node in nodes:
+                    add(*node)
+            else:
+                inboxes[owner].put((NODES, nodes))
+                sent += 1
+
+
+def hdastar(
+    problem: SearchProblem[State],
+    heur: Callable[[State], float],
+    workers: Optional[int] = None,
+    partition: Callable[[State], int] = stable_hash,
+) -> List[State]:
+    """
+    Implement hash-distributed A* search over several processes.
+
+    The heuristic must be admissible for the path to be the cheapest. Under
+    start methods other than fork, problem, heur and partition must be
+    picklable.
+
+    Input:
+        problem - the problem on which the search is conducted, a SearchProblem
+        heur - a heuristic function that takes in a state as input and outputs a number
+        workers - the number of worker processes, one per core by default
+        partition - a function from a state to an int, the same in every
+                    process, that decides which worker owns the state;
+                    stable_hash by default
+
+    Output: a list of states representing the path of the solution, as
+    produced by astar, or [] if no goal state is reachable
+
+    """
+    start_state = problem.get_start_state()
+    if problem.is_goal_state(start_state):
+        return [start_state]
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    inboxes = [multiprocessing.Queue() for _ in range(workers)]
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=hda_worker,
+            args=(i, problem, heur, inboxes, results, partition),
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def receive():
+        while True:
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                if not all(process.is_alive() for process in processes):
+                    raise RuntimeError("an hdastar worker died")
+
+    try:
+        # worker 0 passes the start state on to its owner if need be
+        inboxes[0].put((NODES, [(0, start_state, None)]))
+        sent = 1
+        incumbent = math.inf
+        goal_state = goal_owner = None
+        previous_counts = None
+        counts = {}
+        for inbox in inboxes:
+            inbox.put((PROBE,))
+
+        while True:
+            message = receive()
+            if message[0] == GOAL:
+                _, cost, state, owner = message
+                if cost < incumbent:
+                    incumbent, goal_state, goal_owner = cost, state, owner
+                    for inbox in inboxes:
+                        inbox.put((INCUMBENT, cost))
+            elif message[0] == COUNTS:
+                _, worker, worker_sent, worker_received = message
+                counts[worker] = (worker_sent, worker_received)
+                if len(counts) < workers:
+                    continue
+                total_sent = sent + sum(s for s, _ in counts.values())
+                total_received = sum(r for _, r in counts.values())
+                if total_sent == total_received and counts == previous_counts:
+                    break
+                previous_counts = counts if total_sent == total_received else None
+                counts = {}
+                for inbox in inboxes:
+                    inbox.put((PROBE,))
+
+        if goal_state is None:
+            return []
+        # every worker is idle now, so each answer is the next message
+        path = [goal_state]
+        owner = goal_owner
+        while True:
+            inboxes[owner].put((PARENT, path[-1]))
+            _, state, owner = receive()
+            if state is None:
+                return path[::-1]
+            path.append(state)
+    finally:
+        for inbox in inboxes:
+            inbox.put((STOP,))
+        for process in processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
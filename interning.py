@@ -0,0 +1,66 @@
+# Dense integer ids for the states a search discovers.
+#
+# A search that keeps, for every state it has seen, the state as a dict key
+# and its parent as a dict value holds two dict entries and a reference per
+# state on top of the state itself. A StateTable instead gives each state an
+# id the first time it is seen, 0, 1, 2, ..., and keeps what the search knows
+# about it in flat arrays indexed by id: 4 bytes for a parent, 8 for a cost.
+
+from array import array
+from typing import Dict, Generic, List, Optional
+
+from searchproblem import State
+
+# The parent id of a state with no parent
+NO_PARENT = -1
+
+
+class StateTable(Generic[State]):
+    """
+    Interns states: ids[state] is the id of state, states[id] the state with
+    that id, and parents[id] the id of the state it was reached from (or
+    NO_PARENT). With costs, costs[id] holds a cost for each state too (e.g.
+    its g in A*).
+    """
+
+    def __init__(self, costs: bool = False):
+        """
+        costs - whether to keep a cost for each state
+        """
+        self.ids: Dict[State, int] = {}
+        self.states: List[State] = []
+        self.parents = array("i")
+        self.costs: Optional[array] = array("d") if costs else None
+
+    def add(self, state: State, parent: int = NO_PARENT, cost: float = 0) -> int:
+        """
+        Gives state, which must not have an id yet, the next id, and records
+        its parent id (and cost, if costs are kept).
+
+        Output: the id of state
+        """
+        node = len(self.states)
+        self.ids[state] = node
+        self.states.append(state)
+        self.parents.append(parent)
+        if self.costs is not None:
+            self.costs.append(cost)
+        return node
+
+    def path_to(self, node: int) -> List[State]:
+        """
+        Produces the states from the first state added (or whichever state
+        has no parent) to the state with id node, by following parents.
+        """
+        states, parents = self.states, self.parents
+        path = []
+        while node != NO_PARENT:
+            path.append(states[node])
+            node = parents[node]
+        return path[::-1]
+
+    def __contains__(self, state) -> bool:
+        return state in self.ids
+
+    def __len__(self) -> int:
+        return len(self.states)
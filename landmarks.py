@@ -0,0 +1,174 @@
+# Landmark (ALT) heuristics for A* on a DGraph.
+#
+# A few nodes are chosen as landmarks, and the cost of the shortest path from
+# every landmark L to every node, and from every node to L, is computed once.
+# The triangle inequality then bounds the cost of getting from any node v to
+# a goal g from below, for every landmark L:
+#
+#     d(v, g) >= d(v, L) - d(g, L)    and    d(v, g) >= d(L, g) - d(L, v)
+#
+# The largest of these bounds is an admissible (and consistent) heuristic for
+# any goal set, so the same tables serve every query against the graph.
+
+import heapq
+import math
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from dgraph import CSR, DGraph
+
+
+def shortest_path_tree(csr: CSR, source: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dijkstra's algorithm over the graph csr from source.
+
+    Output: the cost of the cheapest path from source to every node (inf
+    where there is none), and the node before each on that path (-1 for
+    source and for nodes with no path)
+    """
+    offsets, targets, costs = (array.tolist() for array in csr)
+    distances = [math.inf] * (len(offsets) - 1)
+    parents = [-1] * (len(offsets) - 1)
+    distances[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        distance, node = heapq.heappop(heap)
+        if distance > distances[node]:
+            continue
+        for i in range(offsets[node], offsets[node + 1]):
+            target = targets[i]
+            target_distance = distance + costs[i]
+            if target_distance < distances[target]:
+                distances[target] = target_distance
+                parents[target] = node
+                heapq.heappush(heap, (target_distance, target))
+    return np.array(distances), np.array(parents, dtype=np.int64)
+
+
+def shortest_distances(csr: CSR, source: int) -> np.ndarray:
+    """
+    Produces the cost of the cheapest path in the graph csr from source to
+    every node, or inf where there is none.
+    """
+    return shortest_path_tree(csr, source)[0]
+
+
+class Landmarks:
+    """
+    The distances between a set of landmark nodes and every node of a DGraph,
+    for building ALT heuristics (see heuristic).
+
+    from_landmarks[v, i] is the cost of the cheapest path from landmark i to
+    node v, and to_landmarks[v, i] the cost from v to landmark i; inf if
+    there is no path.
+    """
+
+    def __init__(self, from_landmarks: np.ndarray, to_landmarks: np.ndarray):
+        self.from_landmarks = from_landmarks
+        self.to_landmarks = to_landmarks
+
+    @staticmethod
+    def build(graph: DGraph, count: int = 8, seed: int = 0) -> "Landmarks":
+        """
+        Chooses count landmarks in graph and finds their distances. The first
+        landmark is a random node (from seed); each next one is the node
+        farthest, there and back, from the landmarks so far, which spreads
+        them around the edges of the graph, where they bound best.
+        """
+        count = min(count, graph.num_nodes)
+        forward = (graph.offsets, graph.targets, graph.costs)
+        backward = graph.reverse_csr()
+        rng = np.random.default_rng(seed)
+        node = int(rng.integers(graph.num_nodes)) if graph.num_nodes else 0
+        from_columns: List[np.ndarray] = []
+        to_columns: List[np.ndarray] = []
+        # nearness[v]: the least round trip from v to any landmark so far
+        nearness = np.full(graph.num_nodes, math.inf)
+        for _ in range(count):
+            from_columns.append(shortest_distances(forward, node))
+            to_columns.append(shortest_distances(backward, node))
+            nearness = np.minimum(nearness, from_columns[-1] + to_columns[-1])
+            nearness[node] = -1
+            # nodes no landmark reaches or is reached from come first
+            node = int(np.argmax(nearness))
+        shape = (graph.num_nodes, count)
+        if count == 0:
+            return Landmarks(np.zeros(shape), np.zeros(shape))
+        return Landmarks(np.column_stack(from_columns), np.column_stack(to_columns))
+
+    def save(self, path: str):
+        """
+        Writes the distance tables to path as a single .npy file, to keep
+        alongside the graph they were built from.
+        """
+        np.save(path, np.stack([self.from_landmarks, self.to_landmarks]))
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> "Landmarks":
+        """
+        Reads distance tables written by save. With mmap, the file is mapped
+        read-only instead of read in, so that a query only pages in the rows
+        of the nodes it looks at.
+        """
+        tables = np.load(path, mmap_mode="r" if mmap else None)
+        return Landmarks(tables[0], tables[1])
+
+    @property
+    def count(self) -> int:
+        return self.from_landmarks.shape[1]
+
+    def heuristic(self, goal_indices: Iterable[int]) -> Callable[[int], float]:
+        """
+        Produces an admissible heuristic for astar and idastar on the graph
+        for reaching any of the nodes in goal_indices.
+
+        For a set of goals, each landmark's bounds use the goal that makes
+        them weakest: d(v, G) >= d(v, L) - max over g of d(g, L), and
+        d(v, G) >= min over g of d(L, g) - d(L, v).
+        """
+        goals = np.fromiter(goal_indices, dtype=np.int64)
+        if len(goals) == 0:
+            # no goal can be reached from anywhere
+            return lambda state: math.inf
+        # the goals' distances per landmark, with landmarks that give no bound
+        # dropped: those some goal cannot reach, and those reaching no goal
+        goals_to = self.to_landmarks[goals].max(axis=0)
+        goals_from = self.from_landmarks[goals].min(axis=0)
+        to_columns = np.flatnonzero(np.isfinite(goals_to))
+        from_columns = np.flatnonzero(np.isfinite(goals_from))
+        # only copy the tables if some landmarks were dropped
+        to_landmarks = self.to_landmarks
+        if len(to_columns) < self.count:
+            to_landmarks = np.ascontiguousarray(to_landmarks[:, to_columns])
+        from_landmarks = self.from_landmarks
+        if len(from_columns) < self.count:
+            from_landmarks = np.ascontiguousarray(from_landmarks[:, from_columns])
+        goals_to = goals_to[to_columns]
+        goals_from = goals_from[from_columns]
+        goal_set = set(goals.tolist())
+
+        def heur(state: int) -> float:
+            if state in goal_set:
+                return 0.0
+            # an inf bound means state cannot reach any goal
+            bound = 0.0
+            if len(to_columns):
+                bound = max(bound, float((to_landmarks[state] - goals_to).max()))
+            if len(from_columns):
+                bound = max(bound, float((goals_from - from_landmarks[state]).max()))
+            return bound
+
+        return heur
+
+
+def landmark_heuristic(
+    graph: DGraph, landmarks: Optional[Landmarks] = None
+) -> Callable[[int], float]:
+    """
+    Produces the ALT heuristic for graph's own goal states, building
+    Landmarks for it first unless landmarks is given.
+    """
+    if landmarks is None:
+        landmarks = Landmarks.build(graph)
+    return landmarks.heuristic(graph.goal_indices)
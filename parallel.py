@@ -0,0 +1,221 @@
+# Solving many independent search problems across processes.
+#
+# A ParallelSolver keeps a pool of worker processes alive between problems.
+# Expensive shared data (pattern databases, large graphs) is loaded once per
+# worker when it starts, and problems refer to it by name, so it is neither
+# reloaded nor pickled for every problem. Results stream back as each
+# problem finishes.
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from budget import BudgetedProblem, BudgetExceeded
+from dgraph import DGraph
+import search
+from searchproblem import SearchProblem
+
+# A resource is loaded in every worker by calling loader(*args) once.
+Loader = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+# The resources loaded in this worker process, by name
+worker_resources: Dict[str, Any] = {}
+
+ALGORITHMS = {
+    "bfs": search.bfs,
+    "dfs": search.dfs,
+    "ids": search.ids,
+    "bidirectional_bfs": search.bidirectional_bfs,
+    "astar": search.astar,
+    "idastar": search.idastar,
+    "ucs": search.ucs,
+    "tilegame_astar": search.tilegame_astar,
+    "tilegame_idastar": search.tilegame_idastar,
+}
+HEURISTIC_ALGORITHMS = {"astar", "idastar"}
+
+
+class GraphQuery:
+    """
+    A start/goal query against a DGraph loaded as a worker resource, so the
+    graph is shared by every query in the worker instead of being pickled
+    with each one.
+    """
+
+    def __init__(self, graph: str, goal_indices: Set[int], start_state: int = 0):
+        """
+        graph - the name of the resource holding the DGraph
+
+        goal_indices, start_state - as for DGraph
+        """
+        self.graph = graph
+        self.goal_indices = goal_indices
+        self.start_state = start_state
+
+    def __call__(self, resources: Dict[str, Any]) -> DGraph:
+        graph = resources[self.graph]
+        csr = (graph.offsets, graph.targets, graph.costs)
+        return DGraph(None, self.goal_indices, self.start_state, csr)
+
+
+# A problem to solve: either a SearchProblem, or a function of the worker's
+# resources producing one (e.g. a GraphQuery)
+ProblemSpec = Union[SearchProblem, Callable[[Dict[str, Any]], SearchProblem]]
+
+
+class SolveResult(NamedTuple):
+    """
+    The outcome of one problem given to a ParallelSolver.
+
+    status is "solved", "no_solution" (the search finished without a path),
+    "budget_exceeded" or "error" (the search raised; see error).
+    """
+
+    index: int
+    status: str
+    path: List[Any]
+    expansions: int
+    seconds: float
+    error: Optional[str] = None
+
+
+def zero_heuristic(state) -> float:
+    return 0
+
+
+def load_resources(loaders: Dict[str, Loader]):
+    """
+    Loads every resource in loaders into this worker. Run once as each worker
+    process starts.
+    """
+    for name, (loader, args) in loaders.items():
+        worker_resources[name] = loader(*args)
+
+
+def solve_one(
+    index: int,
+    spec: ProblemSpec,
+    algorithm: Union[str, Callable],
+    heuristic: Union[None, str, Callable],
+    max_expansions: Optional[int],
+    max_seconds: Optional[float],
+) -> SolveResult:
+    """
+    Solves one problem in a worker, reporting failures in the result rather
+    than letting them escape.
+    """
+    start = time.monotonic()
+    budgeted = None
+    try:
+        problem = spec if isinstance(spec, SearchProblem) else spec(worker_resources)
+        if max_expansions is not None or max_seconds is not None:
+            deadline = None if max_seconds is None else start + max_seconds
+            problem = budgeted = BudgetedProblem(problem, max_expansions, deadline)
+        if isinstance(algorithm, str):
+            takes_heuristic = algorithm in HEURISTIC_ALGORITHMS
+            algorithm = ALGORITHMS[algorithm]
+        else:
+            takes_heuristic = heuristic is not None
+        if isinstance(heuristic, str):
+            # a worker resource, or a heuristic defined in search.py
+            if heuristic in worker_resources:
+                heuristic = worker_resources[heuristic]
+            else:
+                heuristic = getattr(search, heuristic)
+        if takes_heuristic:
+            path = algorithm(problem, heuristic or zero_heuristic)
+        else:
+            path = algorithm(problem)
+        status = "solved" if path else "no_solution"
+        error = None
+    except BudgetExceeded as e:
+        path, status, error = [], "budget_exceeded", str(e)
+    except Exception as e:
+        path, status, error = [], "error", f"{type(e).__name__}: {e}"
+    expansions = budgeted.expansions if budgeted is not None else -1
+    return SolveResult(
+        index, status, path, expansions, time.monotonic() - start, error
+    )
+
+
+class ParallelSolver:
+    """
+    Solves many independent SearchProblems on a persistent pool of worker
+    processes. Use it as a context manager, or call shutdown when done.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        resources: Optional[Dict[str, Loader]] = None,
+    ):
+        """
+        max_workers - the number of worker processes, one per core by default
+
+        resources - named (loader, args) pairs; every worker calls
+                    loader(*args) once at start-up and keeps the result, for
+                    use by heuristics and problem specs that name it
+        """
+        self.executor = ProcessPoolExecutor(
+            max_workers, initializer=load_resources, initargs=(resources or {},)
+        )
+
+    def solve(
+        self,
+        problems: Iterable[ProblemSpec],
+        algorithm: Union[str, Callable] = "astar",
+        heuristic: Union[None, str, Callable] = None,
+        max_expansions: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+    ) -> Iterator[SolveResult]:
+        """
+        Solves every problem in problems, producing each SolveResult as soon
+        as it is ready, so results arrive in order of completion; each
+        result's index is the position of its problem in problems.
+
+        Input:
+            problems - SearchProblems, or functions of the worker resources
+                       producing them (e.g. GraphQuery)
+            algorithm - a name in ALGORITHMS, or a picklable search function
+            heuristic - for astar and idastar: the name of a worker resource or
+                        of a heuristic in search.py, or a picklable function.
+                        A zero heuristic by default.
+            max_expansions - stop a problem after this many expansions
+            max_seconds - stop a problem after this many seconds
+
+        """
+        futures = [
+            self.executor.submit(
+                solve_one,
+                index,
+                problem,
+                algorithm,
+                heuristic,
+                max_expansions,
+                max_seconds,
+            )
+            for index, problem in enumerate(problems)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
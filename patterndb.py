@@ -0,0 +1,232 @@
+# Additive pattern databases for the tile game.
+#
+# The tiles are split into disjoint groups. For each group, the table gives
+# the exact cost of getting that group's tiles to their goal cells when all
+# other tiles are indistinguishable. Every swap moves at most two tiles, so
+# a swap is charged half a move per tile it moves from the group; summing
+# over groups then never charges more than the one move the swap cost, and
+# the sum of the tables is an admissible heuristic, just as the Manhattan sum
+# is halved in tilegame_heuristic. Costs are stored in half moves.
+#
+# Tables are NumPy arrays indexed by the rank of the group's cells, taken as
+# a partial permutation of the dim ** 2 cells, and are saved as .npy files so
+# they can be memory-mapped by every process that loads them.
+
+import json
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tilegameproblem import TileGameState, adjacent_cells
+
+UNSEEN = 255
+MANIFEST = "patterndb.json"
+
+
+def partial_permutations(n: int, k: int) -> int:
+    """
+    Produces n! / (n - k)!, the number of ways to place k distinct tiles in
+    n cells.
+    """
+    count = 1
+    for i in range(n - k + 1, n + 1):
+        count *= i
+    return count
+
+
+def rank_cells(cells: np.ndarray, n: int) -> np.ndarray:
+    """
+    Ranks each row of cells, an array of shape (m, k) whose rows are
+    distinct cells out of n, into the range [0, n! / (n - k)!).
+    """
+    m, k = cells.shape
+    rank = np.zeros(m, dtype=np.int64)
+    for i in range(k):
+        # the cell's index among the cells not used by earlier tiles
+        digit = cells[:, i].astype(np.int64)
+        for j in range(i):
+            digit -= cells[:, j] < cells[:, i]
+        rank += digit * partial_permutations(n - 1 - i, k - 1 - i)
+    return rank
+
+
+def cell_weights(n: int, k: int) -> List[int]:
+    """
+    Produces the weight of each digit of the rank of k cells out of n, as
+    rank_cells uses them, for rank_cell_sequence.
+    """
+    return [partial_permutations(n - 1 - i, k - 1 - i) for i in range(k)]
+
+
+def rank_cell_sequence(cells: Sequence[int], weights: Sequence[int]) -> int:
+    """
+    Ranks a single sequence of distinct cells exactly as rank_cells ranks a
+    row, given the cell_weights for its length. Faster than rank_cells for
+    one sequence at a time, as when looking up a heuristic.
+    """
+    rank = 0
+    for i, cell in enumerate(cells):
+        digit = cell
+        for earlier in cells[:i]:
+            if earlier < cell:
+                digit -= 1
+        rank += digit * weights[i]
+    return rank
+
+
+def unrank_cells(rank: np.ndarray, n: int, k: int) -> np.ndarray:
+    """
+    The inverse of rank_cells: produces the (len(rank), k) array of cells
+    with the given ranks.
+    """
+    rank = rank.astype(np.int64)
+    cells = np.empty((len(rank), k), dtype=np.int8)
+    free = np.ones((len(rank), n), dtype=bool)
+    for i in range(k):
+        weight = partial_permutations(n - 1 - i, k - 1 - i)
+        digit = rank // weight
+        rank = rank % weight
+        # the digit-th free cell in every row
+        cell = np.argmax(np.cumsum(free, axis=1) > digit[:, None], axis=1)
+        cells[:, i] = cell
+        free[np.arange(len(cell)), cell] = False
+    return cells
+
+
+def build_table(dim: int, group: Sequence[int]) -> np.ndarray:
+    """
+    Produces the table of half-move costs for the tiles in group, by a
+    uniform-cost search outward from the goal. Swaps are their own inverse,
+    so searching from the goal gives the cost of reaching it.
+    """
+    n = dim * dim
+    k = len(group)
+    swaps = adjacent_cells(dim)
+
+    table = np.full(partial_permutations(n, k), UNSEEN, dtype=np.uint8)
+    goal = np.array([[tile - 1 for tile in group]], dtype=np.int8)
+    table[rank_cells(goal, n)] = 0
+
+    # Costs are 1 or 2 half moves, so expanding every state at cost d before
+    # any at cost d + 1 settles each state the first time it is expanded.
+    cost = 0
+    while True:
+        ranks = np.flatnonzero(table == cost)
+        if len(ranks) == 0 and not (table == cost + 1).any():
+            break
+        cells = unrank_cells(ranks, n, k)
+        for c1, c2 in swaps:
+            at_c1 = cells == c1
+            at_c2 = cells == c2
+            moved = at_c1.any(axis=1).astype(np.uint8) + at_c2.any(axis=1)
+            children = np.where(at_c1, c2, np.where(at_c2, c1, cells)).astype(np.int8)
+            child_costs = cost + moved
+            keep = moved > 0
+            child_ranks = rank_cells(children[keep], n)
+            child_costs = child_costs[keep]
+            better = table[child_ranks] > child_costs
+            table[child_ranks[better]] = child_costs[better]
+        cost += 1
+    return table
+
+
+def default_groups(dim: int, group_size: int = 5) -> List[Tuple[int, ...]]:
+    """
+    Splits the tiles 1 to dim ** 2 into consecutive groups of at most
+    group_size tiles.
+    """
+    tiles = list(range(1, dim * dim + 1))
+    return [
+        tuple(tiles[i : i + group_size]) for i in range(0, len(tiles), group_size)
+    ]
+
+
+class PatternDatabase:
+    """
+    A set of additive pattern databases for the tile game of a given
+    dimension, usable as a heuristic for astar and idastar.
+
+    Like tilegame_heuristic, the heuristic measures the cost of reaching the
+    usual goal state, in which tile t is at row (t - 1) // dim and column
+    (t - 1) % dim. It never estimates less than tilegame_heuristic.
+    """
+
+    def __init__(
+        self, dim: int, groups: Sequence[Sequence[int]], tables: Sequence[np.ndarray]
+    ):
+        """
+        dim - the dimension of the tile game
+
+        groups - disjoint groups of tiles that together cover every tile
+
+        tables - the table of half-move costs for each group, as produced by
+                 build_table
+        """
+        self.dim = dim
+        self.groups = [tuple(group) for group in groups]
+        self.tables = list(tables)
+        self.__weights = [cell_weights(dim * dim, len(group)) for group in self.groups]
+
+    @staticmethod
+    def build(
+        dim: int, groups: Optional[Sequence[Sequence[int]]] = None
+    ) -> "PatternDatabase":
+        """
+        Builds the pattern databases for the tile game of dimension dim, with
+        the tiles split into groups (default_groups(dim) by default).
+        """
+        if groups is None:
+            groups = default_groups(dim)
+        tiles = sorted(tile for group in groups for tile in group)
+        if tiles != list(range(1, dim * dim + 1)):
+            raise ValueError("groups must split the tiles 1 to dim ** 2 exactly")
+        return PatternDatabase(dim, groups, [build_table(dim, g) for g in groups])
+
+    def save(self, directory: str):
+        """
+        Writes the tables to directory as .npy files, along with a manifest
+        recording the dimension and the groups.
+        """
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for i, table in enumerate(self.tables):
+            files.append(f"group{i}.npy")
+            np.save(os.path.join(directory, files[-1]), table)
+        manifest = {"dim": self.dim, "groups": self.groups, "files": files}
+        with open(os.path.join(directory, MANIFEST), "w") as f:
+            json.dump(manifest, f)
+
+    @staticmethod
+    def load(directory: str, mmap: bool = True) -> "PatternDatabase":
+        """
+        Reads pattern databases written by save. With mmap, each group's
+        table stays on disk and is paged in as lookups reach it, which lets
+        every worker process load the same directory without a copy each.
+        """
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        mmap_mode = "r" if mmap else None
+        tables = [
+            np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+            for name in manifest["files"]
+        ]
+        return PatternDatabase(manifest["dim"], manifest["groups"], tables)
+
+    def __call__(self, state: TileGameState) -> float:
+        """
+        Produces the heuristic value of the tile game state, state.
+        """
+        cell_of = {}
+        cell = 0
+        for row in state:
+            for tile in row:
+                cell_of[tile] = cell
+                cell += 1
+
+        half_moves = 0
+        for group, weights, table in zip(self.groups, self.__weights, self.tables):
+            cells = [cell_of[tile] for tile in group]
+            half_moves += int(table[rank_cell_sequence(cells, weights)])
+        # a path of m moves is charged at most 2 * m half moves
+        return (half_moves + 1) // 2
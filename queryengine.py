@@ -0,0 +1,182 @@
+# Answering many shortest-path queries against one DGraph.
+#
+# A QueryEngine loads a graph once and keeps what every query can share: the
+# reverse adjacency, landmark tables for A*, and the shortest-path trees it
+# has already grown. A query whose start (or single goal) has a tree is just
+# a walk up that tree; a batch grows one tree for each start (or goal) shared
+# by several queries, and runs A* with the landmark heuristic for the rest.
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from dgraph import DGraph
+from landmarks import Landmarks, shortest_path_tree
+from search import astar
+
+# A query: a start node and the set of goal nodes to reach the cheapest of
+Query = Tuple[int, Set[int]]
+
+
+class ShortestPathTree:
+    """
+    The cheapest paths between one node, the root, and every other node:
+    from the root if forward, and to it otherwise.
+
+    distances[v] is the cost of the path between the root and v (inf if
+    there is none), and parents[v] the node after v on the way to the root
+    (-1 for the root and for nodes with no path).
+    """
+
+    def __init__(
+        self, root: int, distances: np.ndarray, parents: np.ndarray, forward: bool
+    ):
+        self.root = root
+        self.distances = distances
+        self.parents = parents
+        self.forward = forward
+
+    def path(self, node: int) -> List[int]:
+        """
+        Produces the cheapest path between the root and node, as a list of
+        nodes from start to goal, or [] if there is none.
+        """
+        if self.distances[node] == np.inf:
+            return []
+        path = [node]
+        while node != self.root:
+            node = int(self.parents[node])
+            path.append(node)
+        return path[::-1] if self.forward else path
+
+
+class QueryEngine:
+    """
+    Answers shortest-path queries, each a start node and a set of goal nodes,
+    against one DGraph, reusing whatever earlier queries computed.
+    """
+
+    def __init__(
+        self,
+        graph: DGraph,
+        landmarks: Optional[Landmarks] = None,
+        max_trees: int = 64,
+    ):
+        """
+        graph - the graph to answer queries on. Its own start and goals are
+                ignored.
+
+        landmarks - the landmark tables of graph, built the first time A* is
+                    needed if not given
+
+        max_trees - the most shortest-path trees to keep; the least recently
+                    used are dropped first
+        """
+        self.graph = graph
+        self.csr = (graph.offsets, graph.targets, graph.costs)
+        self.reverse_csr = graph.reverse_csr()
+        self.landmarks = landmarks
+        self.max_trees = max_trees
+        # (root, forward) -> ShortestPathTree
+        self.__trees: "OrderedDict[Tuple[int, bool], ShortestPathTree]" = OrderedDict()
+
+    @staticmethod
+    def from_files(
+        graph_path: str, landmarks_path: Optional[str] = None, max_trees: int = 64
+    ) -> "QueryEngine":
+        """
+        Builds a QueryEngine for the graph file at graph_path and, if given,
+        the landmark tables saved at landmarks_path, memory-mapping both.
+        """
+        graph = DGraph.from_file(graph_path, set())
+        landmarks = None if landmarks_path is None else Landmarks.load(landmarks_path)
+        return QueryEngine(graph, landmarks, max_trees)
+
+    def tree(self, root: int, forward: bool = True) -> ShortestPathTree:
+        """
+        Produces the shortest-path tree of paths from root (forward) or to
+        root (not forward), growing it with Dijkstra's algorithm the first
+        time it is asked for.
+        """
+        key = (root, forward)
+        tree = self.__trees.get(key)
+        if tree is not None:
+            self.__trees.move_to_end(key)
+            return tree
+        csr = self.csr if forward else self.reverse_csr
+        tree = ShortestPathTree(root, *shortest_path_tree(csr, root), forward)
+        self.__trees[key] = tree
+        while len(self.__trees) > self.max_trees:
+            self.__trees.popitem(last=False)
+        return tree
+
+    def __cached_tree(
+        self, start: int, goals: Set[int]
+    ) -> Optional[ShortestPathTree]:
+        keys = [(start, True)]
+        if len(goals) == 1:
+            keys.append((next(iter(goals)), False))
+        for key in keys:
+            if key in self.__trees:
+                return self.tree(*key)
+        return None
+
+    def query(self, start: int, goals: Iterable[int]) -> List[int]:
+        """
+        Produces the cheapest path from start to any node in goals, as a list
+        of nodes, or [] if none can be reached. A tree already grown from
+        start, or to the goal, answers it; otherwise it is searched with A*
+        and the landmark heuristic.
+        """
+        goals = set(goals)
+        tree = self.__cached_tree(start, goals)
+        if tree is not None:
+            return self.__path_in_tree(tree, start, goals)
+        if self.landmarks is None:
+            self.landmarks = Landmarks.build(self.graph)
+        problem = DGraph(None, goals, start, self.csr)
+        return astar(problem, self.landmarks.heuristic(goals))
+
+    def query_batch(self, queries: Sequence[Query]) -> List[List[int]]:
+        """
+        Answers every query in queries, producing their paths in the same
+        order. A tree is grown from every start shared by more than one
+        query, and to every single goal shared by more than one of the rest;
+        each remaining query is answered by query.
+        """
+        starts: Dict[int, int] = {}
+        for start, _ in queries:
+            starts[start] = starts.get(start, 0) + 1
+        single_goals: Dict[int, int] = {}
+        for start, goals in queries:
+            if starts[start] == 1 and len(goals) == 1:
+                goal = next(iter(goals))
+                single_goals[goal] = single_goals.get(goal, 0) + 1
+
+        paths = []
+        for start, goals in queries:
+            goals = set(goals)
+            if starts[start] > 1:
+                paths.append(self.__path_in_tree(self.tree(start), start, goals))
+            elif len(goals) == 1 and single_goals[next(iter(goals))] > 1:
+                tree = self.tree(next(iter(goals)), forward=False)
+                paths.append(self.__path_in_tree(tree, start, goals))
+            else:
+                paths.append(self.query(start, goals))
+        return paths
+
+    def __path_in_tree(
+        self, tree: ShortestPathTree, start: int, goals: Set[int]
+    ) -> List[int]:
+        if not goals:
+            return []
+        if not tree.forward:
+            return tree.path(start)
+        goal_list = list(goals)
+        nearest = goal_list[int(np.argmin(tree.distances[goal_list]))]
+        return tree.path(nearest)
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.__trees)
@@ -1,115 +1,449 @@
 # NOTE TO STUDENT: Please read the handout before continuing.
 
-from queue import LifoQueue, PriorityQueue, Queue
-import queue
-from typing import Callable, List
+from array import array
+import math
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import numpy as np
 
 from dgraph import DGraph
+from frontier import (
+    FifoFrontier,
+    Frontier,
+    LifoFrontier,
+    PriorityFrontier,
+    RadixFrontier,
+)
+from interning import StateTable
+from searchevents import EXPANDED, GOAL, LAYER_DONE, Path, SearchEvent
 from searchproblem import SearchProblem, State
-from tilegameproblem import TileGame, TileGameState
+from searchstats import FRONTIER, HEURISTIC, SUCCESSORS, SearchStats
+from tilegameproblem import PackedTileGame, TileGame, TileGameState
+from transposition import TranspositionTable
 
 
 ### GENERAL SEARCH IMPLEMENTATIONS - NOT SPECIFIC TO THE TILEGAME PROBLEM ###
 
-## write the iterations out on paper##
-def search(problem: SearchProblem[State], states) -> List[State]:
-    start_state = problem.get_start_state()
-    states.put(start_state)
-    parent = {}
-    visited_states = set()
-    visited_states.add(start_state)
+def packed_form(problem: SearchProblem) -> Optional[PackedTileGame]:
+    """
+    Produces the PackedTileGame equivalent to problem if problem is exactly a
+    TileGame, for searches to run on instead, and None otherwise. Subclasses
+    are left alone, since they may override get_successors or is_goal_state,
+    as are boards that are not a tuple of row tuples (e.g. a 1x1 board given
+    as a bare int), which pack cannot read.
+    """
+    if type(problem) is not TileGame:
+        return None
+    for board in (problem.get_start_state(), problem.goal_state):
+        if not (isinstance(board, tuple) and all(type(row) is tuple for row in board)):
+            return None
+    return problem.to_packed()
 
-    while not states.empty():
-        state = states.get()
-        if problem.is_goal_state(state):
-            path = []
-            while state in parent:
-                path.append(state)
-                state = parent[state]
-            path.append(state)
-            return path[::-1]
 
-        for child_state in problem.get_successors(state):
-            if child_state not in visited_states:
-                states.put(child_state)
-                parent[child_state] = state
-                visited_states.add(child_state)
-                
-    return []  
-
-def id_search(problem: SearchProblem[State], max_depth) -> List[State]:
-    states = LifoQueue()
-    start_state = problem.get_start_state()
-    states.put(start_state)
-    parent = {}
-    state_to_depth = {}
-    state_to_depth[start_state] = 0
+## write the iterations out on paper##
+def search(
+    problem: SearchProblem[State],
+    states: Frontier[int],
+    stats: Optional[SearchStats] = None,
+) -> List[State]:
+    """
+    The loop behind bfs and dfs. Every state seen is interned in a
+    StateTable, and states holds their ids. A TileGame is searched in its
+    PackedTileGame form, whose states are single ints (see packed_form).
+    """
+    packed = packed_form(problem)
+    if packed is not None:
+        return packed.unpack_path(search(packed, states, stats))
+
+    get_successors, put, get = problem.get_successors, states.put, states.get
+    if stats is not None:
+        get_successors = stats.timed(SUCCESSORS, get_successors)
+        put, get = stats.timed(FRONTIER, put), stats.timed(FRONTIER, get)
+    visited_states = StateTable()
+    ids, all_states, add = visited_states.ids, visited_states.states, visited_states.add
+    put(add(problem.get_start_state()))
 
     while not states.empty():
-        state = states.get()
+        node = get()
+        state = all_states[node]
         if problem.is_goal_state(state):
-            path = []
-            while state in parent:
-                path.append(state)
-                state = parent[state]
-            path.append(state)
-            return path[::-1]
-
-        if state_to_depth[state] < max_depth:
-            for child_state in problem.get_successors(state):
-                if child_state not in state_to_depth or state_to_depth[child_state] > state_to_depth[state] + 1:
-                    state_to_depth[child_state] = state_to_depth[state] + 1
-                    states.put(child_state)
-                    parent[child_state] = state
-                    
-    return []   
+            return visited_states.path_to(node)
+
+        successors = get_successors(state)
+        seen = len(all_states)
+        for child_state in successors:
+            if child_state not in ids:
+                put(add(child_state, node))
+        if stats is not None:
+            duplicates = len(successors) - (len(all_states) - seen)
+            stats.record_expansion(
+                len(successors), duplicates, len(states), len(all_states)
+            )
+
+    return []
+
+def id_search(
+    problem: SearchProblem[State], max_depth, stats: Optional[SearchStats] = None
+) -> Tuple[List[State], bool]:
+    """
+    Depth-limited depth-first search from the start state of problem.
 
+    Only the current path is stored, along with the successors of each state
+    on it still to be tried, so memory is linear in max_depth. States already
+    on the current path are skipped so that cycles are never followed.
 
-def bfs(problem: SearchProblem[State]) -> List[State]:
+    Output: a pair of the path to the first goal state found (or [] if there
+    is none within max_depth), and whether any state was left unexpanded
+    because it was at max_depth.
+    """
+    start_state = problem.get_start_state()
+    if problem.is_goal_state(start_state):
+        return [start_state], False
+    if max_depth == 0:
+        return [], True
+
+    get_successors = problem.get_successors
+    if stats is not None:
+        timed_successors = stats.timed(SUCCESSORS, get_successors)
+
+        def get_successors(state):
+            successors = timed_successors(state)
+            # on_path holds just the path to state whenever these are tried
+            duplicates = sum(1 for child_state in successors if child_state in on_path)
+            stats.record_expansion(len(successors), duplicates, len(path), len(on_path))
+            return successors
+
+    path = [start_state]
+    on_path = {start_state}
+    children = [iter(get_successors(start_state))]
+    cutoff = False
+
+    while children:
+        for child_state in children[-1]:
+            if child_state not in on_path:
+                break
+        else:
+            # Every successor of the state at the end of the path is done
+            children.pop()
+            on_path.discard(path.pop())
+            continue
+
+        if problem.is_goal_state(child_state):
+            path.append(child_state)
+            return path, cutoff
+        if len(path) == max_depth:
+            cutoff = True
+            continue
+        path.append(child_state)
+        on_path.add(child_state)
+        children.append(iter(get_successors(child_state)))
+
+    return [], cutoff
+
+
+# expand(state, hint) produces (child_state, cost, child_h, child_hint) for every
+# successor of state, where hint is whatever was produced alongside state. The
+# hint lets a heuristic be updated incrementally from parent to child.
+Expander = Callable[[Any, Any], Iterable[Tuple[Any, float, float, Any]]]
+
+
+def heuristic_expander(
+    problem: SearchProblem[State],
+    heur: Callable[[State], float],
+    stats: Optional[SearchStats] = None,
+) -> Expander:
+    """
+    Produces an Expander for problem that calls heur on every successor, and
+    takes no hints. If stats is given, the calls are timed in it.
+    """
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed(SUCCESSORS, get_successors)
+        heur = stats.timed(HEURISTIC, heur)
+
+    def expand(state, _):
+        for child_state, cost in get_successors(state).items():
+            yield child_state, cost, heur(child_state), None
+
+    return expand
+
+
+def ida_search(
+    problem: SearchProblem[State],
+    start_h: float,
+    start_hint: Any,
+    expand: Expander,
+    stats: Optional[SearchStats] = None,
+    table: Optional[TranspositionTable] = None,
+) -> List[State]:
+    """
+    The cost-bounded iterative deepening loop behind idastar.
+
+    Each iteration is a depth-first search that only stores the current path,
+    skipping states already on it and any child whose f = g + h exceeds the
+    bound. The next bound is the smallest f that exceeded the current one;
+    when nothing exceeded it, the whole space has been searched.
+
+    With a table, every state searched is stored in it along with a lower
+    bound on its cost to a goal: the least cost + bound over its children,
+    taking a child's h as its bound unless a better one is known. Children
+    already searched this iteration at no greater g are skipped, and h is
+    raised to the known bound wherever that is larger. A child on the path
+    only counts with its h, as bounds learned around a cycle with no goal
+    would otherwise grow by the cycle's cost every iteration.
+
+    Bounds around such cycles still grow, so a child whose f exceeds the
+    bound does not show that anything is left unsearched. Instead, the
+    space has been searched once every child ever cut off by the bound has
+    since been searched itself, which is tracked for up to as many children
+    as the table has slots.
+    """
+    start_state = problem.get_start_state()
+    if problem.is_goal_state(start_state):
+        return [start_state]
+
+    if stats is not None:
+        untimed_expand = expand
+
+        def expand(state, hint):
+            children = list(untimed_expand(state, hint))
+            # on_path holds just the path to state whenever these are tried
+            duplicates = sum(1 for child in children if child[0] in on_path)
+            stats.record_expansion(len(children), duplicates, len(path), len(on_path))
+            return children
+
+    bound = start_h if table is None else table.bound(start_state, start_h)
+    # the children cut off by the bound and not searched since, until there
+    # are too many to track
+    unsearched: Optional[Set[State]] = None if table is None else set()
+    while True:
+        next_bound = math.inf
+        path = [start_state]
+        on_path = {start_state}
+        costs = [0]
+        children = [iter(expand(start_state, start_hint))]
+        if table is not None:
+            table.new_pass()
+            # lowest[i]: the least cost + bound so far over the children of path[i]
+            lowest = [math.inf]
+
+        while children:
+            for child_state, cost, child_h, child_hint in children[-1]:
+                if table is not None:
+                    if child_state not in on_path:
+                        child_h = table.bound(child_state, child_h)
+                    if child_state in on_path or table.seen(
+                        child_state, costs[-1] + cost
+                    ):
+                        if cost + child_h < lowest[-1]:
+                            lowest[-1] = cost + child_h
+                        continue
+                elif child_state in on_path:
+                    continue
+                child_g = costs[-1] + cost
+                f = child_g + child_h
+                if f <= bound:
+                    break
+                if f < next_bound:
+                    next_bound = f
+                if table is not None:
+                    if cost + child_h < lowest[-1]:
+                        lowest[-1] = cost + child_h
+                    if (
+                        unsearched is not None
+                        and f < math.inf
+                        and child_state not in table
+                    ):
+                        unsearched.add(child_state)
+                        if len(unsearched) > table.size:
+                            unsearched = None
+            else:
+                children.pop()
+                state = path.pop()
+                on_path.discard(state)
+                g = costs.pop()
+                if table is not None:
+                    state_bound = lowest.pop()
+                    table.store(state, g, state_bound)
+                    if unsearched is not None:
+                        unsearched.discard(state)
+                    if lowest and g - costs[-1] + state_bound < lowest[-1]:
+                        lowest[-1] = g - costs[-1] + state_bound
+                continue
+
+            path.append(child_state)
+            if problem.is_goal_state(child_state):
+                return path
+            on_path.add(child_state)
+            costs.append(child_g)
+            children.append(iter(expand(child_state, child_hint)))
+            if table is not None:
+                lowest.append(math.inf)
+
+        if next_bound == math.inf or (unsearched is not None and not unsearched):
+            return []
+        bound = next_bound
+
+
+def bfs(
+    problem: SearchProblem[State],
+    frontier: Optional[Frontier[State]] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[State]:
     """
     Implement breadth-first search.
 
     Input:
         problem - the problem on which the search is conducted, a SearchProblem
+        frontier - an empty FIFO frontier to use, a FifoFrontier by default.
+                   Pass a queue.Queue to get a thread-safe one.
+        stats - a SearchStats to record the search in, if any
 
     Output: a list of states representing the path of the solution
 
     """
-    states = Queue()
-    return search(problem, states)
-
-def dfs(problem: SearchProblem[State]) -> List[State]:
+    states = FifoFrontier() if frontier is None else frontier
+    return search(problem, states, stats)
+
+def dfs(
+    problem: SearchProblem[State],
+    frontier: Optional[Frontier[State]] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[State]:
     """
     Implement depth-first search.
 
     Input:
         problem - the problem on which the search is conducted, a SearchProblem
+        frontier - an empty LIFO frontier to use, a LifoFrontier by default.
+                   Pass a queue.LifoQueue to get a thread-safe one.
+        stats - a SearchStats to record the search in, if any
 
     Output: a list of states representing the path of the solution
 
     """
-    states = LifoQueue()
-    return search(problem, states)
+    states = LifoFrontier() if frontier is None else frontier
+    return search(problem, states, stats)
+
+def bidirectional_bfs(problem: SearchProblem[State]) -> List[State]:
+    """
+    Breadth-first search forward from the start state and backward from the
+    goal states at once, expanding a whole layer of whichever side has the
+    smaller frontier until the two sides meet.
+
+    The problem must implement get_goal_states and get_predecessors. Like
+    bfs, the path found has the fewest possible moves.
+
+    Input:
+        problem - the problem on which the search is conducted, a SearchProblem
+
+    Output: a list of states representing the path of the solution, or [] if
+    no goal state is reachable
+
+    """
+    start_state = problem.get_start_state()
+    if problem.is_goal_state(start_state):
+        return [start_state]
+    goal_states = problem.get_goal_states()
+
+    # index 0 is the forward side, 1 the backward side. parent maps a state to
+    # its neighbour one step closer to the start (forward) or goal (backward).
+    parent = [{start_state: None}, {goal: None for goal in goal_states}]
+    depth = [{start_state: 0}, {goal: 0 for goal in goal_states}]
+    layer = [[start_state], list(goal_states)]
+    expand = [problem.get_successors, problem.get_predecessors]
+
+    while layer[0] and layer[1]:
+        side = 0 if len(layer[0]) <= len(layer[1]) else 1
+        other = 1 - side
+        meeting = None
+        best_length = math.inf
+        next_layer = []
+        for state in layer[side]:
+            for child_state in expand[side](state):
+                if child_state in depth[other]:
+                    length = depth[side][state] + 1 + depth[other][child_state]
+                    if length < best_length:
+                        best_length = length
+                        meeting = (state, child_state)
+                if child_state not in parent[side]:
+                    parent[side][child_state] = state
+                    depth[side][child_state] = depth[side][state] + 1
+                    next_layer.append(child_state)
+
+        if meeting is not None:
+            # orient the meeting edge from the forward side to the backward side
+            before, after = meeting if side == 0 else meeting[::-1]
+            path = []
+            state = before
+            while state is not None:
+                path.append(state)
+                state = parent[0][state]
+            path.reverse()
+            state = after
+            while state is not None:
+                path.append(state)
+                state = parent[1][state]
+            return path
+        layer[side] = next_layer
 
-def ids(problem: SearchProblem[State]) -> List[State]:
+    return []
+
+def ids(
+    problem: SearchProblem[State],
+    stats: Optional[SearchStats] = None,
+    table: Optional[TranspositionTable] = None,
+) -> List[State]:
     """
     Implement iterative deepening search.
 
     Input:
         problem - the problem on which the search is conducted, a SearchProblem
+        stats - a SearchStats to record the search in, if any
+        table - a TranspositionTable to remember searched states in, so that
+                each iteration skips what earlier ones proved fruitless. The
+                search is then ida_search with every move costing 1 and h 0.
 
-    Output: a list of states representing the path of the solution
+    Output: a list of states representing the path of the solution, or [] if
+    no goal state is reachable
 
     """
-    depth = 0
-    while True:
-         solution = id_search(problem, depth)
-         if solution != []:
-             return solution
-         depth += 1
+    if table is not None:
+        get_successors = problem.get_successors
+        if stats is not None:
+            get_successors = stats.timed(SUCCESSORS, get_successors)
+
+        def expand(state, _):
+            for child_state in get_successors(state):
+                yield child_state, 1, 0, None
 
+        return ida_search(problem, 0, None, expand, stats, table)
 
-def astar(problem: SearchProblem[State], heur: Callable[[State], float]) -> List[State]:
+    depth = 0
+    while True:
+        solution, cutoff = id_search(problem, depth, stats)
+        # Without a cutoff, every path from the start state has been tried
+        if solution != [] or not cutoff:
+            return solution
+        depth += 1
+
+
+def astar(
+    problem: SearchProblem[State],
+    heur: Callable[[State], float],
+    frontier: Optional[Frontier] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[State]:
     """
     Implement A* search.
 
@@ -123,34 +457,426 @@ def astar(problem: SearchProblem[State], heur: Callable[[State], float]) -> List
     Input:
         problem - the problem on which the search is conducted, a SearchProblem
         heur - a heuristic function that takes in a state as input and outputs a number
+        frontier - an empty priority frontier of (priority, state) pairs, a
+                   PriorityFrontier by default. Pass a queue.PriorityQueue to
+                   get a thread-safe one.
+        stats - a SearchStats to record the search in, if any
+
+    heur is called for every state generated. For a TileGame with
+    tilegame_heuristic, tilegame_astar is faster: it updates the heuristic
+    incrementally instead.
+
+    Output: a list of states representing the path of the solution
+
+    """
+    states = PriorityFrontier() if frontier is None else frontier
+    expand = heuristic_expander(problem, heur, stats)
+    start_h = heur(problem.get_start_state())
+    return astar_search(problem, start_h, None, expand, states, stats)
+
+
+def astar_search(
+    problem: SearchProblem[State],
+    start_h: float,
+    start_hint: Any,
+    expand: Expander,
+    states: Frontier,
+    stats: Optional[SearchStats] = None,
+) -> List[State]:
+    """
+    The best-first loop behind astar, over successors produced by expand
+    (see Expander) and an empty priority frontier, states.
+    """
+    put, get = states.put, states.get
+    if stats is not None:
+        put, get = stats.timed(FRONTIER, put), stats.timed(FRONTIER, get)
+    # Every state seen is interned, with its g as its cost; closed[id] is 1
+    # once the state with that id has been expanded.
+    table = StateTable(costs=True)
+    ids, all_states, parents, cost_so_far = (
+        table.ids,
+        table.states,
+        table.parents,
+        table.costs,
+    )
+    closed = bytearray()
+    # Entries are ((f, -g), (id, hint)): among equal f, the deeper state is
+    # popped first, since it is likely closer to the goal.
+    put(((start_h, 0), (table.add(problem.get_start_state()), start_hint)))
+    closed.append(0)
+
+    while not states.empty():
+        (_, neg_g), (node, hint) = get()
+        # A cheaper path to the state was found after this entry was pushed,
+        # or it was already expanded through an entry just as cheap.
+        if -neg_g > cost_so_far[node] or closed[node]:
+            continue
+        state = all_states[node]
+        if problem.is_goal_state(state):
+            return table.path_to(node)
+        closed[node] = 1
+
+        g = cost_so_far[node]
+        generated = improved = 0
+        for child_state, cost, child_h, child_hint in expand(state, hint):
+            generated += 1
+            child_g = g + cost
+            child = ids.get(child_state)
+            if child is None:
+                child = table.add(child_state, node, child_g)
+                closed.append(0)
+            elif child_g < cost_so_far[child]:
+                parents[child] = node
+                cost_so_far[child] = child_g
+                # Reopen the child if an inconsistent heuristic closed it early
+                closed[child] = 0
+            else:
+                continue
+            improved += 1
+            put(((child_g + child_h, -child_g), (child, child_hint)))
+        if stats is not None:
+            stats.record_expansion(
+                generated, generated - improved, len(states), len(all_states)
+            )
+
+    return []
+
+
+def integer_costs(problem: SearchProblem) -> bool:
+    """
+    Whether every edge of problem is known to cost a non-negative integer:
+    true of a TileGame, whose swaps all cost 1, and of a DGraph whose costs
+    are all whole numbers. Other problems, including subclasses of these
+    that may override get_successors, are not looked into.
+    """
+    if type(problem) in (TileGame, PackedTileGame):
+        return True
+    if type(problem) is DGraph:
+        costs = problem.costs
+        return bool(np.all((costs >= 0) & (costs == np.floor(costs))))
+    return False
+
+
+def ucs(
+    problem: SearchProblem[State],
+    frontier: Optional[Frontier] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[State]:
+    """
+    Uniform-cost search (Dijkstra's algorithm): expands states in order of
+    the cost of the cheapest path found to them, so the first goal state
+    expanded is reached by a cheapest path. Edge costs must not be negative.
+
+    Input:
+        problem - the problem on which the search is conducted, a SearchProblem
+        frontier - an empty priority frontier of (cost, state) pairs. By
+                   default a RadixFrontier if every cost is an integer (see
+                   integer_costs), which is faster, and a PriorityFrontier
+                   otherwise.
+        stats - a SearchStats to record the search in, if any
 
     Output: a list of states representing the path of the solution
 
     """
-    states = PriorityQueue()
+    packed = packed_form(problem)
+    if packed is not None:
+        return packed.unpack_path(ucs(packed, frontier, stats))
+    integral = integer_costs(problem)
+    if frontier is None:
+        frontier = RadixFrontier() if integral else PriorityFrontier()
+
+    get_successors, put, get = problem.get_successors, frontier.put, frontier.get
+    if stats is not None:
+        get_successors = stats.timed(SUCCESSORS, get_successors)
+        put, get = stats.timed(FRONTIER, put), stats.timed(FRONTIER, get)
+    # as in astar_search, but every entry is (g, id) and g is exact when it
+    # is popped, so nothing is ever reopened
+    table = StateTable(costs=True)
+    ids, all_states, parents, cost_so_far = (
+        table.ids,
+        table.states,
+        table.parents,
+        table.costs,
+    )
+    closed = bytearray()
+    put((0, table.add(problem.get_start_state())))
+    closed.append(0)
+
+    while not frontier.empty():
+        g, node = get()
+        if closed[node] or g > cost_so_far[node]:
+            continue
+        state = all_states[node]
+        if problem.is_goal_state(state):
+            return table.path_to(node)
+        closed[node] = 1
+
+        successors = get_successors(state)
+        improved = 0
+        for child_state, cost in successors.items():
+            child_g = g + cost
+            child = ids.get(child_state)
+            if child is None:
+                child = table.add(child_state, node, child_g)
+                closed.append(0)
+            elif child_g < cost_so_far[child]:
+                parents[child] = node
+                cost_so_far[child] = child_g
+            else:
+                continue
+            improved += 1
+            put((int(child_g) if integral else child_g, child))
+        if stats is not None:
+            stats.record_expansion(
+                len(successors), len(successors) - improved, len(frontier), len(table)
+            )
+
+    return []
+
+
+def anytime_astar(
+    problem: SearchProblem[State],
+    heur: Callable[[State], float],
+    weight: float = 2.0,
+    frontier: Optional[Frontier] = None,
+) -> Iterator[List[State]]:
+    """
+    Implement anytime weighted A* search.
+
+    States are expanded in order of g + weight * h, which reaches a first
+    solution quickly. The search then carries on, ignoring any state whose
+    g + h cannot beat the cheapest solution so far, and produces each cheaper
+    solution as it is found. Once it stops, the last solution produced is
+    the cheapest (if heur is admissible).
+
+    Input:
+        problem - the problem on which the search is conducted, a SearchProblem
+        heur - a heuristic function that takes in a state as input and outputs a number
+        weight - how much more than g to weigh the heuristic, at least 1
+        frontier - an empty priority frontier, a PriorityFrontier by default
+
+    Output: an iterator of paths, each a list of states cheaper than the last
+
+    """
+    states = PriorityFrontier() if frontier is None else frontier
     start_state = problem.get_start_state()
-    states.put((heur(start_state), start_state))
+    start_h = heur(start_state)
+    states.put(((weight * start_h, 0), (start_state, start_h)))
     parent = {}
     cost_so_far = {}
     cost_so_far[start_state] = 0
+    closed = set()
+    incumbent = math.inf
 
     while not states.empty():
-        _, state = states.get()
+        (_, neg_g), (state, h) = states.get()
+        g = -neg_g
+        if g > cost_so_far[state] or state in closed or g + h >= incumbent:
+            continue
         if problem.is_goal_state(state):
+            incumbent = g
             path = []
             while state in parent:
                 path.append(state)
                 state = parent[state]
             path.append(state)
-            return path[::-1]
+            yield path[::-1]
+            continue
+        closed.add(state)
 
         for child_state, cost in problem.get_successors(state).items():
-            if child_state not in cost_so_far:
-                parent[child_state] = state
-                cost_so_far[child_state] = cost_so_far[state] + cost
-                states.put((cost_so_far[child_state] + heur(child_state), child_state))
-                    
-    return []   
+            child_g = g + cost
+            if child_state in cost_so_far and child_g >= cost_so_far[child_state]:
+                continue
+            child_h = heur(child_state)
+            if child_g + child_h >= incumbent:
+                continue
+            parent[child_state] = state
+            cost_so_far[child_state] = child_g
+            closed.discard(child_state)
+            states.put(((child_g + weight * child_h, -child_g), (child_state, child_h)))
+
+
+def idastar(
+    problem: SearchProblem[State],
+    heur: Callable[[State], float],
+    stats: Optional[SearchStats] = None,
+    table: Optional[TranspositionTable] = None,
+) -> List[State]:
+    """
+    Implement iterative deepening A* search.
+
+    Like astar, but memory is linear in the depth of the solution rather
+    than in the number of states seen, at the price of re-expanding states
+    on every iteration.
+
+    heur is called for every state generated. For a TileGame with
+    tilegame_heuristic, tilegame_idastar is faster: it updates the heuristic
+    incrementally instead.
+
+    Input:
+        problem - the problem on which the search is conducted, a SearchProblem
+        heur - a heuristic function that takes in a state as input and outputs a number
+        stats - a SearchStats to record the search in, if any
+        table - a TranspositionTable to remember searched states in, so that
+                each iteration skips what earlier ones proved fruitless (see
+                ida_search)
+
+    Output: a list of states representing the path of the solution, or [] if
+    no goal state is reachable
+
+    """
+    expand = heuristic_expander(problem, heur, stats)
+    start_h = heur(problem.get_start_state())
+    return ida_search(problem, start_h, None, expand, stats, table)
+
+
+### GENERATOR SEARCHES - THE SEARCH AS A STREAM OF SearchEvents ###
+#
+# These produce a SearchEvent for every state expanded, and a last one with the
+# path once a goal is reached, so a caller can report progress as the search
+# runs and cancel it just by no longer iterating. They intern every state seen
+# in a StateTable, so the path is a compact Path of ids into that table rather
+# than a second list of states.
+
+
+def goal_event(state: Any, depth: float, path: Path) -> Iterator[SearchEvent]:
+    """
+    Produces the GOAL event of a generator search, detaching path from the
+    search's table once the search is resumed or closed, as nothing else
+    will be added to the table after it.
+    """
+    try:
+        yield SearchEvent(GOAL, state, depth, path)
+    finally:
+        path.detach()
+
+
+def iter_bfs(problem: SearchProblem[State]) -> Iterator[SearchEvent]:
+    """
+    Breadth-first search as a generator, visiting states in the same order
+    as bfs.
+
+    Input:
+        problem - the problem on which the search is conducted, a SearchProblem
+
+    Output: an iterator of SearchEvents: EXPANDED for each state expanded,
+    LAYER_DONE once every state at a depth has been, and finally GOAL with
+    the path, unless no goal state is reachable
+
+    """
+    table = StateTable()
+    nodes, index = table.states, table.ids
+    layer = [table.add(problem.get_start_state())]
+    depth = 0
+
+    while layer:
+        next_layer = []
+        for node in layer:
+            state = nodes[node]
+            if problem.is_goal_state(state):
+                yield from goal_event(state, depth, Path(nodes, table.parents, node))
+                return
+            for child_state in problem.get_successors(state):
+                if child_state not in index:
+                    next_layer.append(table.add(child_state, node))
+            yield SearchEvent(EXPANDED, state, depth)
+        yield SearchEvent(LAYER_DONE, None, depth)
+        layer = next_layer
+        depth += 1
+
+
+def iter_dfs(problem: SearchProblem[State]) -> Iterator[SearchEvent]:
+    """
+    Depth-first search as a generator, visiting states in the same order as
+    dfs.
+
+    Input:
+        problem - the problem on which the search is conducted, a SearchProblem
+
+    Output: an iterator of SearchEvents: EXPANDED for each state expanded,
+    and finally GOAL with the path, unless no goal state is reachable
+
+    """
+    table = StateTable()
+    nodes, index = table.states, table.ids
+    depths = array("i", [0])
+    stack = [table.add(problem.get_start_state())]
+
+    while stack:
+        node = stack.pop()
+        state = nodes[node]
+        if problem.is_goal_state(state):
+            path = Path(nodes, table.parents, node)
+            yield from goal_event(state, depths[node], path)
+            return
+        for child_state in problem.get_successors(state):
+            if child_state not in index:
+                stack.append(table.add(child_state, node))
+                depths.append(depths[node] + 1)
+        yield SearchEvent(EXPANDED, state, depths[node])
+
+
+def iter_astar(
+    problem: SearchProblem[State],
+    heur: Callable[[State], float],
+    frontier: Optional[Frontier] = None,
+) -> Iterator[SearchEvent]:
+    """
+    A* search as a generator, finding the same cost of path as astar.
+
+    Input:
+        problem - the problem on which the search is conducted, a SearchProblem
+        heur - a heuristic function that takes in a state as input and outputs a number
+        frontier - an empty priority frontier, a PriorityFrontier by default
+
+    Output: an iterator of SearchEvents: EXPANDED for each state expanded,
+    with its g as its depth; LAYER_DONE once the f of the states expanded
+    rises past a value, given as the depth; and finally GOAL with the path,
+    unless no goal state is reachable
+
+    """
+    states = PriorityFrontier() if frontier is None else frontier
+    start_state = problem.get_start_state()
+    table = StateTable(costs=True)
+    nodes, index, parents, cost_so_far = (
+        table.states,
+        table.ids,
+        table.parents,
+        table.costs,
+    )
+    closed = set()
+    layer_f = heur(start_state)
+    # entries are ((f, -g), id), as in astar_search
+    states.put(((layer_f, 0), table.add(start_state)))
+
+    while not states.empty():
+        (f, neg_g), node = states.get()
+        g = -neg_g
+        if g > cost_so_far[node] or node in closed:
+            continue
+        if f > layer_f:
+            yield SearchEvent(LAYER_DONE, None, layer_f)
+            layer_f = f
+        state = nodes[node]
+        if problem.is_goal_state(state):
+            yield from goal_event(state, g, Path(nodes, parents, node))
+            return
+        closed.add(node)
+
+        for child_state, cost in problem.get_successors(state).items():
+            child_g = g + cost
+            child = index.get(child_state)
+            if child is None:
+                child = table.add(child_state, node, child_g)
+            elif child_g < cost_so_far[child]:
+                parents[child] = node
+                cost_so_far[child] = child_g
+                closed.discard(child)
+            else:
+                continue
+            states.put(((child_g + heur(child_state), -child_g), child))
+        yield SearchEvent(EXPANDED, state, g)
 
 
 ### SPECIFIC TO THE TILEGAME PROBLEM ###
@@ -174,6 +900,85 @@ def tilegame_heuristic(state: TileGameState) -> float:
             cost += abs(n_row - (tile - 1) // size) + abs(n_col - (tile - 1)%size)
     return cost //2
 
+
+def tilegame_heuristic_update(manhattan: int, delta: int) -> Tuple[float, int]:
+    """
+    Produces the heuristic of a successor in O(1) from its parent.
+
+    Input:
+        manhattan - the Manhattan sum of the parent, i.e. TileGame.manhattan_distance
+        delta - the change in the Manhattan sum made by the move to the
+                successor, as produced by TileGame.get_successors_with_delta
+
+    Output: a pair of the successor's heuristic and its Manhattan sum, to be
+    passed on when updating the heuristic of its own successors.
+
+    """
+    manhattan += delta
+    return manhattan // 2, manhattan
+
+
+def tilegame_expander(
+    problem: Union[TileGame, PackedTileGame], stats: Optional[SearchStats] = None
+) -> Expander:
+    """
+    Produces an Expander for problem whose hints are Manhattan sums, so that
+    each successor's heuristic comes from tilegame_heuristic_update. If stats
+    is given, the calls are timed in it.
+    """
+    get_successors, update = problem.get_successors_with_delta, tilegame_heuristic_update
+    if stats is not None:
+        get_successors = stats.timed(SUCCESSORS, get_successors)
+        update = stats.timed(HEURISTIC, update)
+
+    def expand(state, manhattan):
+        for child_state, cost, delta in get_successors(state):
+            child_h, child_manhattan = update(manhattan, delta)
+            yield child_state, cost, child_h, child_manhattan
+
+    return expand
+
+
+def tilegame_astar(
+    problem: TileGame,
+    frontier: Optional[Frontier] = None,
+    stats: Optional[SearchStats] = None,
+) -> List[TileGameState]:
+    """
+    A* with tilegame_heuristic, run over the PackedTileGame form of problem
+    with the heuristic updated incrementally for every swap.
+
+    The Manhattan sums are measured to problem's goal state, which is what
+    tilegame_heuristic measures whenever the goal is the usual one.
+    """
+    states = PriorityFrontier() if frontier is None else frontier
+    packed = problem.to_packed()
+    manhattan = packed.manhattan_distance(packed.get_start_state())
+    expand = tilegame_expander(packed, stats)
+    path = astar_search(packed, manhattan // 2, manhattan, expand, states, stats)
+    return packed.unpack_path(path)
+
+
+def tilegame_idastar(
+    problem: TileGame,
+    stats: Optional[SearchStats] = None,
+    table: Optional[TranspositionTable] = None,
+) -> List[TileGameState]:
+    """
+    IDA* with tilegame_heuristic, run over the PackedTileGame form of problem
+    with the heuristic updated incrementally for every swap.
+
+    The Manhattan sums are measured to problem's goal state, which is what
+    tilegame_heuristic measures whenever the goal is the usual one. A table
+    given is keyed on the packed states.
+    """
+    packed = problem.to_packed()
+    manhattan = packed.manhattan_distance(packed.get_start_state())
+    expand = tilegame_expander(packed, stats)
+    path = ida_search(packed, manhattan // 2, manhattan, expand, stats, table)
+    return packed.unpack_path(path)
+
+
 ### YOUR SANDBOX ###
 
 
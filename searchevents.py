@@ -0,0 +1,106 @@
+# What the generator searches in search.py (iter_bfs, iter_dfs, iter_astar)
+# produce as they run.
+
+from array import array
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence
+
+from interning import NO_PARENT
+
+# The kinds of SearchEvent
+EXPANDED = "expanded"  # state has just been expanded
+LAYER_DONE = "layer_done"  # every state at depth (or f) has been expanded
+GOAL = "goal"  # state is a goal, reached along path
+
+
+class Path(Sequence):
+    """
+    A path found by a search, held as the id of its last state in the
+    StateTable the search interned its states in. The states are not copied
+    out of the table: the path itself only keeps one int per step, worked out
+    the first time it is needed.
+
+    A Path is a sequence of states, so it can be indexed, iterated and
+    measured like the list the other searches produce; list(path) makes one.
+
+    Once the search is over, detach copies out just the states on the path
+    and lets go of the table, so that a Path kept by the caller does not keep
+    every state the search saw alive.
+    """
+
+    def __init__(self, nodes: List[Any], parents: "array[int]", last: int):
+        """
+        nodes - the states of the table, by id
+        parents - the id of each state's parent, or NO_PARENT
+        last - the id of the path's last state
+        """
+        self.nodes: Optional[List[Any]] = nodes
+        self.parents: Optional["array[int]"] = parents
+        self.last = last
+        self.__indices: Optional["array[int]"] = None
+        # the states on the path, once detached
+        self.__states: Optional[List[Any]] = None
+
+    def detach(self):
+        """
+        Copies the states on the path out of the table and drops the table.
+        indices still produces the ids they had in it.
+        """
+        if self.__states is None:
+            nodes = self.nodes
+            self.__states = [nodes[node] for node in self.indices()]
+            self.nodes = self.parents = None
+
+    def indices(self) -> "array[int]":
+        """
+        Produces the id of every state on the path, in order.
+        """
+        if self.__indices is None:
+            indices = array("i")
+            node = self.last
+            while node != NO_PARENT:
+                indices.append(node)
+                node = self.parents[node]
+            indices.reverse()
+            self.__indices = indices
+        return self.__indices
+
+    def __len__(self) -> int:
+        return len(self.indices())
+
+    def __getitem__(self, i):
+        if self.__states is not None:
+            return self.__states[i]
+        if isinstance(i, slice):
+            return [self.nodes[node] for node in self.indices()[i]]
+        return self.nodes[self.indices()[i]]
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.__states is not None:
+            return iter(self.__states)
+        nodes = self.nodes
+        return (nodes[node] for node in self.indices())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Path, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Path({list(self)!r})"
+
+
+class SearchEvent(NamedTuple):
+    """
+    One step of a generator search.
+
+    kind - EXPANDED, LAYER_DONE or GOAL
+    state - the state expanded or reached; None for LAYER_DONE
+    depth - the state's depth (or g, for iter_astar); for LAYER_DONE, the
+            depth (or f) of the layer just finished
+    path - for GOAL, the path to state
+    """
+
+    kind: str
+    state: Any
+    depth: float
+    path: Optional[Path] = None
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Generic, Hashable, TypeVar
+from typing import Dict, Generic, Hashable, List, TypeVar
 
 # In SearchProblem, we require that all states are hashable so that we can
 # represent successive states as a dictionary.
@@ -33,3 +33,24 @@ class SearchProblem(ABC, Generic[State]):
         each associated key.
         """
         pass
+
+    # Optional extensions, for searches that also work backward from the goal
+    # (e.g. bidirectional_bfs). Problems opt in by overriding both.
+
+    def get_goal_states(self) -> List[State]:
+        """
+        Produces a list of every goal state.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not list its goal states"
+        )
+
+    def get_predecessors(self, state: State) -> Dict[State, float]:
+        """
+        Produces a dictionary, whose keys are the states from which the given
+        state can be reached and whose values are the costs of reaching the
+        given state from each associated key.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not produce predecessors"
+        )
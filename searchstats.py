@@ -0,0 +1,86 @@
+# Counters and timers for watching a search as it runs.
+#
+# The searches in search.py take an optional SearchStats. Without one they run
+# exactly as before; with one they report every expansion to it, and time the
+# calls they make through it (see SearchStats.timed).
+
+import time
+from typing import Callable, Dict, Optional
+
+# The kinds of call a search times
+SUCCESSORS = "successors"
+HEURISTIC = "heuristic"
+FRONTIER = "frontier"
+
+
+class SearchStats:
+    """
+    What a search did: how many states it expanded and generated, how many of
+    the generated states it had already seen, how large its frontier and
+    visited set grew, and how long it spent generating successors, computing
+    heuristics and operating on its frontier.
+
+    For the depth-first searches (ids, idastar) the frontier is the current
+    path and the visited set is the states on it.
+    """
+
+    def __init__(
+        self,
+        progress: Optional[Callable[["SearchStats"], None]] = None,
+        every: int = 10000,
+    ):
+        """
+        progress - called with these stats after every `every` expansions, to
+                   follow a long search as it runs
+        """
+        self.progress = progress
+        self.every = every
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.peak_frontier = 0
+        self.peak_visited = 0
+        self.seconds: Dict[str, float] = {SUCCESSORS: 0.0, HEURISTIC: 0.0, FRONTIER: 0.0}
+
+    def record_expansion(
+        self, generated: int, duplicates: int, frontier_size: int, visited_size: int
+    ):
+        """
+        Records the expansion of one state, which generated `generated`
+        successors, `duplicates` of which had been seen before, leaving the
+        frontier and visited set at the given sizes.
+        """
+        self.expanded += 1
+        self.generated += generated
+        self.duplicates += duplicates
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if visited_size > self.peak_visited:
+            self.peak_visited = visited_size
+        if self.progress is not None and self.expanded % self.every == 0:
+            self.progress(self)
+
+    def timed(self, kind: str, f: Callable) -> Callable:
+        """
+        Produces a function that calls f, adding the time each call takes to
+        self.seconds[kind].
+        """
+        seconds = self.seconds
+        seconds.setdefault(kind, 0.0)
+
+        def timed_f(*args):
+            start = time.perf_counter()
+            try:
+                return f(*args)
+            finally:
+                seconds[kind] += time.perf_counter() - start
+
+        return timed_f
+
+    def __repr__(self):
+        times = ", ".join(f"{kind} {t:.3f}s" for kind, t in self.seconds.items())
+        return (
+            f"SearchStats(expanded={self.expanded}, generated={self.generated}, "
+            f"duplicates={self.duplicates}, peak_frontier={self.peak_frontier}, "
+            f"peak_visited={self.peak_visited}, {times})"
+        )
@@ -0,0 +1,235 @@
+# A cache of TileGame solutions that also answers symmetric queries.
+#
+# Turning or flipping the grid keeps adjacent cells adjacent, so it maps every
+# sequence of swaps to one of the same length. A board B transformed this way
+# has its solution transformed too, except that it ends at the transformed
+# goal; renaming the tiles so that the transformed goal becomes the goal again
+# gives a board equivalent to B, with a solution just as long. Of the (up to)
+# eight boards equivalent to B this way, the cache stores only the smallest,
+# its canonical form, so a solution found for one serves all of them.
+
+from collections import OrderedDict
+import functools
+import json
+import sqlite3
+from typing import Callable, Dict, List, Optional, Tuple
+
+from search import tilegame_astar
+from tilegameproblem import TileGame, TileGameState
+
+# A board flattened row-major
+FlatBoard = Tuple[int, ...]
+
+# How to turn a board into its canonical form: destination[cell] is the cell
+# that the tile in cell moves to, and labels[tile] the tile it is renamed to.
+Symmetry = Tuple[Tuple[int, ...], Dict[int, int]]
+
+
+@functools.lru_cache(maxsize=None)
+def grid_symmetries(dim: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Produces the distinct rotations and reflections of a dim x dim grid, each
+    as the cell that every cell (row-major) is moved to.
+    """
+    last = dim - 1
+    moves = [
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (last - c, last - r),
+    ]
+    symmetries = []
+    for move in moves:
+        destination = tuple(
+            row * dim + col
+            for row, col in (move(cell // dim, cell % dim) for cell in range(dim * dim))
+        )
+        if destination not in symmetries:
+            symmetries.append(destination)
+    return tuple(symmetries)
+
+
+def flatten(board: TileGameState) -> FlatBoard:
+    return tuple(int(tile) for row in board for tile in row)
+
+
+def unflatten(flat: FlatBoard, dim: int) -> TileGameState:
+    return tuple(tuple(flat[row * dim : (row + 1) * dim]) for row in range(dim))
+
+
+def move_cells(flat: FlatBoard, destination: Tuple[int, ...]) -> FlatBoard:
+    moved = [0] * len(flat)
+    for cell, tile in enumerate(flat):
+        moved[destination[cell]] = tile
+    return tuple(moved)
+
+
+def canonicalize(
+    board: TileGameState, goal: TileGameState
+) -> Tuple[FlatBoard, Symmetry]:
+    """
+    Produces the canonical form of board for reaching goal, flattened, and the
+    Symmetry that turned board into it.
+    """
+    flat_board, flat_goal = flatten(board), flatten(goal)
+    best = None
+    for destination in grid_symmetries(len(board)):
+        moved_goal = move_cells(flat_goal, destination)
+        labels = dict(zip(moved_goal, flat_goal))
+        candidate = tuple(labels[tile] for tile in move_cells(flat_board, destination))
+        if best is None or candidate < best[0]:
+            best = candidate, (destination, labels)
+    return best
+
+
+def uncanonicalize(flat: FlatBoard, symmetry: Symmetry, dim: int) -> TileGameState:
+    """
+    Undoes symmetry on a flattened board, producing the (unflattened) board
+    it was made from.
+    """
+    destination, labels = symmetry
+    names = {label: tile for tile, label in labels.items()}
+    board = tuple(names[flat[destination[cell]]] for cell in range(len(flat)))
+    return unflatten(board, dim)
+
+
+def solve_with_astar(problem: TileGame) -> List[TileGameState]:
+    return tilegame_astar(problem)
+
+
+def search_tag(search: Callable) -> str:
+    """
+    Produces the name a SolutionCache keeps the solutions of search under,
+    looking through functools.partial to the function it wraps.
+    """
+    while isinstance(search, functools.partial):
+        search = search.func
+    module = getattr(search, "__module__", None)
+    name = getattr(search, "__qualname__", None) or type(search).__qualname__
+    return f"{module}.{name}"
+
+
+class SolutionCache:
+    """
+    Remembers the solution of every TileGame it solves, so that the same
+    board, or any board equivalent to it under a rotation or reflection of
+    the grid, is answered without searching again.
+
+    The most recently used max_entries solutions are kept in memory. Given a
+    path, every solution is also kept in an SQLite database there, which
+    outlives the process and is consulted whenever memory misses.
+
+    Solutions are reused for every equivalent board, so the search used must
+    find shortest paths (e.g. bfs, or astar with an admissible heuristic).
+    Each search's solutions are kept apart from every other's, so that one
+    shared between searches never answers for a search it did not run.
+    """
+
+    def __init__(self, max_entries: int = 100000, path: Optional[str] = None):
+        """
+        max_entries - the most solutions to keep in memory
+
+        path - an SQLite database file to keep every solution in, if any
+        """
+        self.max_entries = max_entries
+        self.__memory: "OrderedDict[str, List[FlatBoard]]" = OrderedDict()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            with self.db:
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS solutions"
+                    " (key TEXT PRIMARY KEY, path TEXT)"
+                )
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def solve(
+        self,
+        problem: TileGame,
+        search: Callable[[TileGame], List[TileGameState]] = solve_with_astar,
+        tag: Optional[str] = None,
+    ) -> List[TileGameState]:
+        """
+        Produces the path that search(problem) would, up to ties between
+        shortest paths, searching only if no equivalent board has been
+        solved before.
+
+        Input:
+            problem - the TileGame to solve
+            search - a function from a TileGame to a shortest path, such as
+                     bfs; tilegame_astar by default
+            tag - the name the solutions of search are kept under, by default
+                  its module and qualified name. Searches that share a name,
+                  such as lambdas or differently configured partials, need
+                  tags of their own, and the same search needs the same tag
+                  in every process sharing the database.
+
+        Output: a list of states representing the path of the solution
+
+        """
+        goal = problem.goal_state
+        dim = len(goal)
+        canonical, symmetry = canonicalize(problem.get_start_state(), goal)
+        if tag is None:
+            tag = search_tag(search)
+        key = json.dumps([tag, flatten(goal), canonical])
+
+        flat_path = self.__lookup(key)
+        if flat_path is None:
+            self.misses += 1
+            path = search(TileGame(dim, unflatten(canonical, dim), goal))
+            flat_path = [flatten(state) for state in path]
+            self.__store(key, flat_path)
+        return [uncanonicalize(state, symmetry, dim) for state in flat_path]
+
+    def __lookup(self, key: str) -> Optional[List[FlatBoard]]:
+        flat_path = self.__memory.get(key)
+        if flat_path is not None:
+            self.__memory.move_to_end(key)
+            self.hits += 1
+            return flat_path
+        if self.db is not None:
+            row = self.db.execute(
+                "SELECT path FROM solutions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                flat_path = [tuple(state) for state in json.loads(row[0])]
+                self.__remember(key, flat_path)
+                return flat_path
+        return None
+
+    def __store(self, key: str, flat_path: List[FlatBoard]):
+        self.__remember(key, flat_path)
+        if self.db is not None:
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO solutions VALUES (?, ?)",
+                    (key, json.dumps(flat_path)),
+                )
+
+    def __remember(self, key: str, flat_path: List[FlatBoard]):
+        self.__memory[key] = flat_path
+        self.__memory.move_to_end(key)
+        while len(self.__memory) > self.max_entries:
+            self.__memory.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.__memory)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,155 @@
+# Exact distances for every board of a small tile game.
+#
+# A board of dim ** 2 tiles is a permutation, and for dim <= 3 there are at
+# most 9! = 362,880 of them. Each is ranked into [0, (dim ** 2)!) by its
+# Lehmer code (rank_cells, with every cell taken), so a single uint8 array
+# holds the number of moves from every board to the goal, filled in by one
+# breadth-first search outward from the goal. Any query is then answered
+# without searching: the distance is one lookup, and a shortest path is found
+# by repeatedly moving to a successor one move closer.
+#
+# Renaming the tiles commutes with swapping them, so the table built for the
+# usual goal serves every goal: a board is renamed so that the goal's tile in
+# each cell becomes the usual goal's before it is looked up.
+
+import math
+from typing import List, Optional
+
+import numpy as np
+
+from patterndb import UNSEEN, cell_weights, rank_cell_sequence, rank_cells, unrank_cells
+from tilegameproblem import TileGame, TileGameState, adjacent_cells
+
+# The largest dimension whose boards can all be held in memory
+MAX_DIM = 3
+
+
+def build_distances(dim: int) -> np.ndarray:
+    """
+    Produces the number of moves from every board of dimension dim to the
+    usual goal, indexed by rank_cells, by a breadth-first search outward from
+    the goal. Swaps are their own inverse, so searching from the goal gives
+    the cost of reaching it.
+    """
+    if dim > MAX_DIM:
+        raise ValueError(f"a {dim}x{dim} board has too many states to enumerate")
+    n = dim * dim
+    distances = np.full(math.factorial(n), UNSEEN, dtype=np.uint8)
+    ranks = rank_cells(np.arange(n)[None, :], n)
+    distances[ranks] = 0
+    swaps = adjacent_cells(dim)
+
+    depth = 0
+    while len(ranks):
+        boards = unrank_cells(ranks, n, n)
+        for c1, c2 in swaps:
+            children = boards.copy()
+            children[:, [c1, c2]] = boards[:, [c2, c1]]
+            child_ranks = rank_cells(children, n)
+            unseen = child_ranks[distances[child_ranks] == UNSEEN]
+            distances[unseen] = depth + 1
+        depth += 1
+        ranks = np.flatnonzero(distances == depth)
+    return distances
+
+
+class DistanceTable:
+    """
+    The number of moves from every board of a tile game of dimension at most
+    MAX_DIM to the goal, answering distance and shortest path queries for
+    any board and goal in time proportional to the length of the path.
+    """
+
+    def __init__(self, dim: int, distances: np.ndarray):
+        """
+        dim - the dimension of the tile game
+
+        distances - the distance of every board to the usual goal, by rank,
+                    as produced by build_distances
+        """
+        self.dim = dim
+        self.distances = distances
+        self.__swaps = adjacent_cells(dim)
+        self.__weights = cell_weights(dim * dim, dim * dim)
+
+    @staticmethod
+    def build(dim: int = 3) -> "DistanceTable":
+        """
+        Enumerates every board of the tile game of dimension dim.
+        """
+        return DistanceTable(dim, build_distances(dim))
+
+    def save(self, path: str):
+        """
+        Writes the distances to path as a .npy file.
+        """
+        np.save(path, self.distances)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> "DistanceTable":
+        """
+        Reads distances written by save, working out the dimension from how
+        many there are. With mmap, the distances are mapped read-only from
+        the file instead of copied into each process that answers queries.
+        """
+        distances = np.load(path, mmap_mode="r" if mmap else None)
+        n = 1
+        while math.factorial(n) < len(distances):
+            n += 1
+        return DistanceTable(math.isqrt(n), distances)
+
+    def __rank(self, flat: List[int]) -> int:
+        # the rank of a relabelled board among all the boards
+        return rank_cell_sequence(flat, self.__weights)
+
+    def __relabel(
+        self, board: TileGameState, goal: Optional[TileGameState]
+    ) -> List[int]:
+        # the board flattened, with goal's tile in each cell renamed to the
+        # cell's index, so that the goal becomes the usual one
+        if goal is None:
+            return [tile - 1 for row in board for tile in row]
+        goal_flat = [tile for row in goal for tile in row]
+        labels = {tile: cell for cell, tile in enumerate(goal_flat)}
+        return [labels[tile] for row in board for tile in row]
+
+    def distance(
+        self, board: TileGameState, goal: Optional[TileGameState] = None
+    ) -> int:
+        """
+        Produces the fewest moves from board to goal, the usual goal if none
+        is given.
+        """
+        return int(self.distances[self.__rank(self.__relabel(board, goal))])
+
+    def solve(self, problem: TileGame) -> List[TileGameState]:
+        """
+        Produces a shortest path from the start state of problem to its goal
+        state, by moving each time to a successor one move closer to the
+        goal. Usable as the search of a SolutionCache.
+
+        Output: a list of states representing the path of the solution
+
+        """
+        start, goal = problem.get_start_state(), problem.goal_state
+        if len(start) != self.dim:
+            raise ValueError(f"the table is for {self.dim}x{self.dim} boards")
+        goal_flat = [tile for row in goal for tile in row]
+        flat = self.__relabel(start, goal)
+        distance = int(self.distances[self.__rank(flat)])
+        path = [start]
+        while distance > 0:
+            for c1, c2 in self.__swaps:
+                flat[c1], flat[c2] = flat[c2], flat[c1]
+                if self.distances[self.__rank(flat)] == distance - 1:
+                    break
+                flat[c1], flat[c2] = flat[c2], flat[c1]
+            distance -= 1
+            board = [goal_flat[label] for label in flat]
+            path.append(
+                tuple(
+                    tuple(board[row * self.dim : (row + 1) * self.dim])
+                    for row in range(self.dim)
+                )
+            )
+        return path
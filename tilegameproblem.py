@@ -13,6 +13,24 @@ Row = Tuple[int, ...]
 TileGameState = Tuple[Row, ...]
 LRow = List[int]
 TileGameLState = List[LRow]
+# A TileGameState flattened row-major and packed into a single int, with
+# tile t stored as t - 1 in the cell's bit field (see PackedTileGame)
+PackedTileGameState = int
+
+
+def adjacent_cells(dim: int) -> List[Tuple[int, int]]:
+    """
+    Produces every pair of adjacent cells of a dim x dim board, as row-major
+    cell indices, in the order TileGame.get_successors makes its swaps.
+    """
+    pairs = []
+    for r in range(dim):
+        for c in range(dim):
+            if r < dim - 1:
+                pairs.append((r * dim + c, (r + 1) * dim + c))
+            if c < dim - 1:
+                pairs.append((r * dim + c, r * dim + c + 1))
+    return pairs
 
 
 class TileGame(SearchProblem[TileGameState]):
@@ -21,16 +39,25 @@ class TileGame(SearchProblem[TileGameState]):
         dim: int,
         start_state: Optional[TileGameState] = None,
         goal_state: Optional[TileGameState] = None,
+        rng: Optional[np.random.Generator] = None,
     ):
+        """
+        rng - the random number generator for a random start state; the
+              global NumPy one by default. Pass np.random.default_rng(seed)
+              for a reproducible start state.
+        """
         self.__dim = dim
         if start_state == None:
-            self.__start_state = TileGame.random_start(dim)
+            self.__start_state = TileGame.random_start(dim, rng)
         else:
             self.__start_state = start_state
         if goal_state == None:
             self.goal_state = self.__construct_goal()
         else:
             self.goal_state = goal_state
+        # goal_cells for the goal state they were built from; see __goal_cells
+        self.__goal_cells_of = None
+        self.__goal_cells_cache = {}
 
     ###### SEARCH PROBLEM IMPLEMENTATION ######
 
@@ -51,6 +78,56 @@ class TileGame(SearchProblem[TileGameState]):
         costs = itertools.repeat(1)
         return dict(zip(successors, costs))
 
+    def get_goal_states(self):
+        return [self.goal_state]
+
+    def get_predecessors(self, state: TileGameState):
+        # every swap is undone by making it again
+        return self.get_successors(state)
+
+    ###### INCREMENTAL HEURISTIC SUPPORT ######
+
+    def manhattan_distance(self, state: TileGameState) -> int:
+        """
+        Produces the sum, over all tiles, of the Manhattan distance between
+        the tile's cell in state and its cell in the goal state.
+        """
+        goal_cells = self.__goal_cells()
+        distance = 0
+        for r, row in enumerate(state):
+            for c, tile in enumerate(row):
+                goal_r, goal_c = goal_cells[tile]
+                distance += abs(r - goal_r) + abs(c - goal_c)
+        return distance
+
+    def get_successors_with_delta(
+        self, state: TileGameState
+    ) -> List[Tuple[TileGameState, float, int]]:
+        """
+        Produces a list of (successor, cost, delta) for every successor of
+        state, in the same order as get_successors, where delta is
+        manhattan_distance(successor) - manhattan_distance(state).
+
+        A swap moves exactly two tiles, so each delta takes constant time.
+        """
+        successors = []
+        for r in range(self.__dim):
+            for c in range(self.__dim):
+                if r < self.__dim - 1:
+                    successors.append(self.__swap_with_delta(state, r, c, r + 1, c))
+                if c < self.__dim - 1:
+                    successors.append(self.__swap_with_delta(state, r, c, r, c + 1))
+        return successors
+
+    ###### ALTERNATIVE ENCODINGS ######
+
+    def to_packed(self) -> "PackedTileGame":
+        """
+        Produces the equivalent PackedTileGame, which has the same start and
+        goal states but represents every board as a single int.
+        """
+        return PackedTileGame(self.__dim, self.__start_state, self.goal_state)
+
     ###### INTERNAL HELPER FUNCTIONS ######
 
     def __construct_goal(self):
@@ -76,14 +153,48 @@ class TileGame(SearchProblem[TileGameState]):
         board[r1][c1], board[r2][c2] = board[r2][c2], board[r1][c1]
         return TileGame.list_to_tuple(board)
 
+    def __goal_cells(self):
+        """
+        Produces a dictionary from each tile to its (row, column) in the goal
+        state, rebuilding it only when goal_state has been replaced.
+        """
+        if self.__goal_cells_of != self.goal_state:
+            self.__goal_cells_cache = {
+                tile: (r, c)
+                for r, row in enumerate(self.goal_state)
+                for c, tile in enumerate(row)
+            }
+            self.__goal_cells_of = self.goal_state
+        return self.__goal_cells_cache
+
+    def __swap_with_delta(self, board, r1, c1, r2, c2):
+        """
+        Swaps tile at (r1, c1) with tile at (r2, c2) on board, producing the
+        new board, its cost, and the change in manhattan_distance.
+        """
+        goal_cells = self.__goal_cells()
+        t1 = board[r1][c1]
+        t2 = board[r2][c2]
+        g1r, g1c = goal_cells[t1]
+        g2r, g2c = goal_cells[t2]
+        delta = (
+            abs(r2 - g1r) + abs(c2 - g1c) + abs(r1 - g2r) + abs(c1 - g2c)
+            - abs(r1 - g1r) - abs(c1 - g1c) - abs(r2 - g2r) - abs(c2 - g2c)
+        )
+        return TileGame.__swap_tiles(board, r1, c1, r2, c2), 1, delta
+
     ###### HELPFUL FUNCTIONS FOR YOU ######
 
     @staticmethod
-    def random_start(dim: int) -> TileGameState:
+    def random_start(
+        dim: int, rng: Optional[np.random.Generator] = None
+    ) -> TileGameState:
         """
-        Given the dimension, dim, of the tile game, produces a random start state.
+        Given the dimension, dim, of the tile game, produces a random start state,
+        drawn from rng if given and from the global NumPy generator otherwise.
         """
-        board_arr = (np.random.permutation(dim ** 2) + 1).reshape(dim, dim)
+        permutation = np.random.permutation if rng is None else rng.permutation
+        board_arr = (permutation(dim ** 2) + 1).reshape(dim, dim)
         return TileGame.list_to_tuple(board_arr)
 
     @staticmethod
@@ -138,3 +249,156 @@ class TileGame(SearchProblem[TileGameState]):
         """
         for b in board_path:
             print(TileGame.board_to_pretty_string(b))
+
+
+class PackedTileGame(SearchProblem[PackedTileGameState]):
+    """
+    The tile game with each board packed into a single int.
+
+    Cell (r, c) of the board occupies the bit field starting at
+    (r * dim + c) * bits, where bits is just wide enough to hold dim ** 2 - 1.
+    Swapping two tiles is then a handful of shifts and xors using the
+    precomputed swap table, instead of rebuilding a tuple of tuples.
+
+    Use unpack or unpack_path to get back TileGameStates, e.g. for
+    TileGame.print_pretty_path.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        start_state: Optional[TileGameState] = None,
+        goal_state: Optional[TileGameState] = None,
+    ):
+        self.dim = dim
+        self.bits = max(1, (dim * dim - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        # (shift1, shift2) for every pair of adjacent cells, in the same order
+        # that TileGame.get_successors produces its swaps
+        swaps = [(c1 * self.bits, c2 * self.bits) for c1, c2 in adjacent_cells(dim)]
+        self.swaps = tuple(swaps)
+        # the swaps again, with the cell index of each shift alongside
+        self.__swap_cells = tuple(
+            (s1, s2, s1 // self.bits, s2 // self.bits) for s1, s2 in swaps
+        )
+
+        tilegame = TileGame(dim, start_state, goal_state)
+        self.__start_state = self.pack(tilegame.get_start_state())
+        self.goal_state = self.pack(tilegame.goal_state)
+        # distance table for the goal state it was built from; see __distances
+        self.__distances_of = None
+        self.__distances_cache = []
+
+    ###### SEARCH PROBLEM IMPLEMENTATION ######
+
+    def get_start_state(self):
+        return self.__start_state
+
+    def is_goal_state(self, state: PackedTileGameState):
+        return state == self.goal_state
+
+    def get_successors(self, state: PackedTileGameState):
+        mask = self.mask
+        successors = {}
+        for s1, s2 in self.swaps:
+            x = ((state >> s1) ^ (state >> s2)) & mask
+            successors[state ^ ((x << s1) | (x << s2))] = 1
+        return successors
+
+    def get_goal_states(self):
+        return [self.goal_state]
+
+    def get_predecessors(self, state: PackedTileGameState):
+        # every swap is undone by making it again
+        return self.get_successors(state)
+
+    ###### INCREMENTAL HEURISTIC SUPPORT ######
+
+    def manhattan_distance(self, state: PackedTileGameState) -> int:
+        """
+        Produces the sum, over all tiles, of the Manhattan distance between
+        the tile's cell in state and its cell in the goal state.
+        """
+        distances = self.__distances()
+        bits, mask = self.bits, self.mask
+        return sum(
+            distances[(state >> (cell * bits)) & mask][cell]
+            for cell in range(self.dim * self.dim)
+        )
+
+    def get_successors_with_delta(
+        self, state: PackedTileGameState
+    ) -> List[Tuple[PackedTileGameState, float, int]]:
+        """
+        Produces a list of (successor, cost, delta) for every successor of
+        state, in the same order as get_successors, where delta is
+        manhattan_distance(successor) - manhattan_distance(state).
+        """
+        distances = self.__distances()
+        mask = self.mask
+        successors = []
+        for s1, s2, c1, c2 in self.__swap_cells:
+            t1 = (state >> s1) & mask
+            t2 = (state >> s2) & mask
+            d1 = distances[t1]
+            d2 = distances[t2]
+            x = t1 ^ t2
+            successors.append(
+                (
+                    state ^ ((x << s1) | (x << s2)),
+                    1,
+                    d1[c2] + d2[c1] - d1[c1] - d2[c2],
+                )
+            )
+        return successors
+
+    def __distances(self):
+        """
+        Produces the table whose entry [t][cell] is the Manhattan distance from
+        cell to the goal cell of packed tile t, rebuilding it only when
+        goal_state has been replaced.
+        """
+        if self.__distances_of != self.goal_state:
+            dim, bits, mask = self.dim, self.bits, self.mask
+            goal_cells = [0] * (dim * dim)
+            for cell in range(dim * dim):
+                goal_cells[(self.goal_state >> (cell * bits)) & mask] = cell
+            self.__distances_cache = [
+                [
+                    abs(cell // dim - goal // dim) + abs(cell % dim - goal % dim)
+                    for cell in range(dim * dim)
+                ]
+                for goal in goal_cells
+            ]
+            self.__distances_of = self.goal_state
+        return self.__distances_cache
+
+    ###### ENCODING ######
+
+    def pack(self, board: TileGameState) -> PackedTileGameState:
+        """
+        Packs the tile game board, board, into a single int. Tiles may be
+        NumPy integers (as random_start makes them); they are converted to
+        ints first, as a 4x4 board does not fit in 64 bits.
+        """
+        packed = 0
+        shift = 0
+        for row in board:
+            for tile in row:
+                packed |= (int(tile) - 1) << shift
+                shift += self.bits
+        return packed
+
+    def unpack(self, state: PackedTileGameState) -> TileGameState:
+        """
+        Converts the packed state, state, back into a tile game board.
+        """
+        dim, bits, mask = self.dim, self.bits, self.mask
+        tiles = [((state >> (i * bits)) & mask) + 1 for i in range(dim * dim)]
+        return tuple(tuple(tiles[r * dim : (r + 1) * dim]) for r in range(dim))
+
+    def unpack_path(self, path: List[PackedTileGameState]) -> List[TileGameState]:
+        """
+        Converts a list of packed states, path, into a list of tile game boards.
+        """
+        return [self.unpack(state) for state in path]
@@ -0,0 +1,114 @@
+# A transposition table for the iterative deepening searches.
+#
+# ids and idastar only remember the current path, so every iteration searches
+# again every subtree the last one did, and within an iteration a state reached
+# along two paths is searched twice. A TranspositionTable remembers, in a fixed
+# number of slots, the states they have finished searching: the cheapest g at
+# which each was searched in the current pass, so that reaching it again no
+# more cheaply can be skipped, and a lower bound on its cost to a goal learned
+# from searching it, which can only be as large as or larger than the
+# heuristic and so prunes more on every later pass.
+
+import math
+from typing import Any, Hashable
+
+POLICIES = ("depth", "lru")
+
+
+class TranspositionTable:
+    """
+    A fixed-size table of (state, g, bound) entries, each state stored in
+    the slot hash(state) % size. When two states want the same slot, the
+    policy decides which is kept:
+
+    "depth" - the one searched at the smaller g, whose subtree is likely the
+              larger and so the more expensive to search again. Entries
+              from earlier passes always give way.
+    "lru" - the one stored most recently, so the least recently used is
+            evicted
+
+    A table belongs to one problem: the bounds it learns are only valid for
+    searches with the same goal and moves. Pass it to several searches of the
+    same problem to share what they learn, or call clear to start again.
+    """
+
+    def __init__(self, size: int = 1 << 20, policy: str = "depth"):
+        """
+        size - the number of slots, which bounds the table's memory
+        policy - which entry keeps a contested slot, one of POLICIES
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.size = size
+        self.policy = policy
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets every entry.
+        """
+        self.__states = [None] * self.size
+        self.__g = [math.inf] * self.size
+        self.__bound = [0] * self.size
+        self.__pass = [-1] * self.size
+        self.current_pass = 0
+
+    def new_pass(self):
+        """
+        Starts a new pass of the search (e.g. an iteration of idastar). The g
+        of entries stored in earlier passes is no longer used for pruning,
+        but their bounds still are.
+        """
+        self.current_pass += 1
+
+    def bound(self, state: Hashable, h: float) -> float:
+        """
+        Produces the best known lower bound on the cost from state to a goal:
+        h, or the bound learned for state if that is larger.
+        """
+        slot = hash(state) % self.size
+        if self.__states[slot] == state and self.__bound[slot] > h:
+            return self.__bound[slot]
+        return h
+
+    def seen(self, state: Hashable, g: float) -> bool:
+        """
+        Whether state has been searched in this pass at a cost of g or less.
+        """
+        slot = hash(state) % self.size
+        return (
+            self.__pass[slot] == self.current_pass
+            and self.__g[slot] <= g
+            and self.__states[slot] == state
+        )
+
+    def store(self, state: Hashable, g: float, bound: float):
+        """
+        Records that state has been searched in this pass at a cost of g,
+        learning that its cost to a goal is at least bound.
+        """
+        slot = hash(state) % self.size
+        stored = self.__states[slot]
+        if stored == state:
+            bound = max(bound, self.__bound[slot])
+            if self.__pass[slot] == self.current_pass:
+                g = min(g, self.__g[slot])
+        elif (
+            self.policy == "depth"
+            and stored is not None
+            and self.__pass[slot] == self.current_pass
+            and self.__g[slot] < g
+        ):
+            return
+        self.__states[slot] = state
+        self.__g[slot] = g
+        self.__bound[slot] = bound
+        self.__pass[slot] = self.current_pass
+
+    def __len__(self) -> int:
+        return self.size - self.__states.count(None)
+
+    def __contains__(self, state: Any) -> bool:
+        return self.__states[hash(state) % self.size] == state
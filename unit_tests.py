@@ -1,8 +1,70 @@
 import unittest
 
-from dgraph import DGraph
-from search import astar, bfs, dfs, ids, tilegame_heuristic
-from tilegameproblem import TileGame
+import numpy as np
+
+from batch import manhattan_batch, solve_batch
+from benchmark import random_dgraph, run_benchmark, tilegame_corpus
+from budget import (
+    Budget,
+    BudgetedFrontier,
+    BudgetedProblem,
+    BudgetExceeded,
+    run_search,
+)
+from contraction import ContractionHierarchy
+from dgraph import DGraph, convert_edge_list, read_graph_file
+from frontier import (
+    FifoFrontier,
+    Frontier,
+    LifoFrontier,
+    PriorityFrontier,
+    RadixFrontier,
+)
+from hdastar import hdastar, stable_hash
+from interning import NO_PARENT, StateTable
+from landmarks import Landmarks, landmark_heuristic, shortest_distances
+from parallel import GraphQuery, ParallelSolver, zero_heuristic
+from patterndb import (
+    PatternDatabase,
+    cell_weights,
+    partial_permutations,
+    rank_cell_sequence,
+    rank_cells,
+    unrank_cells,
+)
+from queryengine import QueryEngine
+from search import (
+    anytime_astar,
+    astar,
+    bfs,
+    bidirectional_bfs,
+    dfs,
+    id_search,
+    idastar,
+    ids,
+    integer_costs,
+    iter_astar,
+    iter_bfs,
+    iter_dfs,
+    packed_form,
+    tilegame_astar,
+    tilegame_heuristic,
+    tilegame_heuristic_update,
+    tilegame_idastar,
+    ucs,
+)
+from searchevents import EXPANDED, GOAL, LAYER_DONE, Path
+from searchstats import FRONTIER, HEURISTIC, SUCCESSORS, SearchStats
+from solutioncache import SolutionCache, canonicalize, grid_symmetries
+from statespace import DistanceTable
+from tilegameproblem import PackedTileGame, TileGame
+from transposition import TranspositionTable
+import itertools
+import os
+import queue
+import subprocess
+import sys
+import tempfile
 import time
 import multiprocessing
 
@@ -374,6 +436,1369 @@ class IOTest(unittest.TestCase):
         self._check_dgraph(lambda p: astar(p, lambda s: 0))
 
 
+class PackedTileGameTest(unittest.TestCase):
+    """
+    Tests that PackedTileGame is a faithful re-encoding of TileGame.
+    """
+
+    def test_pack_roundtrip(self):
+        board = ((8, 2, 4), (6, 3, 1), (9, 5, 7))
+        ptg = PackedTileGame(3, board)
+        self.assertEqual(ptg.unpack(ptg.get_start_state()), board)
+        self.assertEqual(ptg.unpack(ptg.goal_state), ((1, 2, 3), (4, 5, 6), (7, 8, 9)))
+
+    def test_successors_match_tilegame(self):
+        board = ((3, 2, 1, 4), (5, 6, 7, 8), (9, 11, 10, 12), (14, 15, 16, 13))
+        tg = TileGame(4, board)
+        ptg = tg.to_packed()
+        packed_successors = ptg.get_successors(ptg.get_start_state())
+        self.assertEqual(
+            {ptg.unpack(s): c for s, c in packed_successors.items()},
+            tg.get_successors(board),
+        )
+
+    def test_pack_numpy_tiles(self):
+        # the last tile of a 4x4 board is shifted past 64 bits
+        board = TileGame.list_to_tuple(
+            np.array([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 16, 15]])
+        )
+        ptg = PackedTileGame(4, board)
+        self.assertGreater(ptg.get_start_state(), 0)
+        self.assertEqual(ptg.unpack(ptg.get_start_state()), board)
+        successors = ptg.get_successors(ptg.get_start_state())
+        self.assertTrue(any(ptg.is_goal_state(s) for s in successors))
+        random_board = TileGame.random_start(4, np.random.default_rng(0))
+        ptg = PackedTileGame(4, random_board)
+        self.assertEqual(ptg.unpack(ptg.get_start_state()), random_board)
+
+    def test_search_on_packed(self):
+        ptg = PackedTileGame(3, ((8, 2, 4), (6, 3, 1), (9, 5, 7)))
+        path = ptg.unpack_path(bfs(ptg))
+        self.assertEqual(path[0], ((8, 2, 4), (6, 3, 1), (9, 5, 7)))
+        self.assertEqual(path[-1], ((1, 2, 3), (4, 5, 6), (7, 8, 9)))
+        self.assertEqual(len(path), 11, "Path length should be 11")
+
+    def test_unpackable_board(self):
+        # ((1)) is just 1, not a tuple of rows, so pack cannot read it
+        tg = TileGame(1, ((1)), ((1)))
+        self.assertIsNone(packed_form(tg))
+        self.assertEqual(bfs(tg), [1])
+        self.assertEqual(dfs(tg), [1])
+        self.assertIsNotNone(packed_form(TileGame(1, ((1,),), ((1,),))))
+
+
+class FrontierTest(unittest.TestCase):
+    """
+    Tests the ordering of the frontiers used by the search algorithms.
+    """
+
+    def _drain(self, frontier):
+        items = []
+        while not frontier.empty():
+            items.append(frontier.get())
+        return items
+
+    def test_fifo_and_lifo(self):
+        fifo, lifo = FifoFrontier(), LifoFrontier()
+        for i in range(4):
+            fifo.put(i)
+            lifo.put(i)
+        self.assertEqual(len(fifo), 4)
+        self.assertEqual(self._drain(fifo), [0, 1, 2, 3])
+        self.assertEqual(self._drain(lifo), [3, 2, 1, 0])
+
+    def test_priority_ties_use_insertion_order(self):
+        frontier = PriorityFrontier()
+        # dicts are not comparable, so ties must never fall through to them
+        frontier.put((2, {"a": 1}))
+        frontier.put((1, {"b": 2}))
+        frontier.put((2, {"c": 3}))
+        self.assertEqual(
+            self._drain(frontier), [(1, {"b": 2}), (2, {"a": 1}), (2, {"c": 3})]
+        )
+
+    def test_incomplete_frontier(self):
+        class NoLength(Frontier):
+            def put(self, item):
+                pass
+
+            def get(self):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoLength()
+
+    def test_radix(self):
+        frontier = RadixFrontier()
+        for priority in (5, 0, 9, 5, 1000, 3):
+            frontier.put((priority, {"p": priority}))
+        self.assertEqual(frontier.get(), (0, {"p": 0}))
+        self.assertEqual(frontier.get(), (3, {"p": 3}))
+        frontier.put((4, {"p": 4}))
+        with self.assertRaises(ValueError):
+            frontier.put((2, {"p": 2}))
+        self.assertEqual(len(frontier), 5)
+        priorities = [priority for priority, _ in self._drain(frontier)]
+        self.assertEqual(priorities, [4, 5, 5, 9, 1000])
+
+    def test_thread_safe_queues_still_accepted(self):
+        simple_problem = ((3, 2), (1, 4))
+        tg = TileGame(2, simple_problem, ((1, 2), (3, 4)))
+        self.assertEqual(len(bfs(tg, queue.Queue())), 2)
+        self.assertEqual(dfs(tg, queue.LifoQueue())[-1], ((1, 2), (3, 4)))
+        path = astar(tg, tilegame_heuristic, queue.PriorityQueue())
+        self.assertEqual(len(path), 2)
+
+
+class AStarTest(unittest.TestCase):
+    """
+    Tests that astar finds cheapest paths when edge costs are not uniform.
+    """
+
+    def test_cheaper_path_found_later(self):
+        # 0 -> 1 directly costs 10, but 0 -> 2 -> 1 costs 2
+        dg = DGraph(
+            [
+                [None, 10, 1, None],
+                [None, None, None, 1],
+                [None, 1, None, None],
+                [None, None, None, None],
+            ],
+            {3},
+        )
+        self.assertEqual(astar(dg, lambda s: 0), [0, 2, 1, 3])
+
+    def test_inconsistent_heuristic_reopens(self):
+        # h(1) is admissible but inconsistent, so 2 is closed via 0 -> 2
+        # before the cheaper 0 -> 1 -> 2 is found
+        dg = DGraph(
+            [
+                [None, 1, 4, None],
+                [None, None, 1, None],
+                [None, None, None, 10],
+                [None, None, None, None],
+            ],
+            {3},
+        )
+        h = {0: 0, 1: 11, 2: 0, 3: 0}
+        self.assertEqual(astar(dg, lambda s: h[s]), [0, 1, 2, 3])
+
+
+class UCSTest(unittest.TestCase):
+    """
+    Tests that ucs finds cheapest paths, with whichever frontier it uses.
+    """
+
+    def test_cheaper_path_found_later(self):
+        dg = DGraph(
+            [
+                [None, 10, 1, None],
+                [None, None, None, 1],
+                [None, 1, None, None],
+                [None, None, None, None],
+            ],
+            {3},
+        )
+        self.assertTrue(integer_costs(dg))
+        self.assertEqual(ucs(dg), [0, 2, 1, 3])
+        self.assertEqual(ucs(dg, PriorityFrontier()), [0, 2, 1, 3])
+
+    def test_fractional_costs(self):
+        dg = DGraph.from_edges(
+            4, [(0, 1, 0.5), (1, 3, 0.25), (0, 2, 0.1), (2, 3, 0.7)], {3}
+        )
+        self.assertFalse(integer_costs(dg))
+        self.assertEqual(ucs(dg), [0, 1, 3])
+
+    def test_matches_astar(self):
+        graph = random_dgraph(2000, 3, seed=8, num_goals=3)
+        path = ucs(graph)
+        expected = astar(graph, zero_heuristic)
+        def cost(path):
+            return sum(graph.get_successors(a)[b] for a, b in zip(path, path[1:]))
+
+        self.assertEqual(cost(path), cost(expected))
+        csr = (graph.offsets, graph.targets, graph.costs)
+        self.assertEqual(ucs(DGraph(None, set(), 0, csr)), [])
+
+    def test_tilegame(self):
+        tg = TileGame(3, ((1, 2, 3), (4, 5, 6), (8, 7, 9)))
+        stats = SearchStats()
+        self.assertEqual(len(ucs(tg, stats=stats)), 2)
+        self.assertGreater(stats.expanded, 0)
+
+    def test_numpy_4x4_board(self):
+        start = TileGame.random_start(4, np.random.default_rng(2))
+        goal = TileGame.tuple_to_list(start)
+        goal[2][1], goal[2][2] = goal[2][2], goal[2][1]
+        tg = TileGame(4, start, TileGame.list_to_tuple(goal))
+        self.assertEqual(ucs(tg), [start, tg.goal_state])
+
+    def test_subclass_is_not_packed(self):
+        class CostlyGame(TileGame):
+            def get_successors(self, state):
+                return {child: 0.5 for child in super().get_successors(state)}
+
+        tg = CostlyGame(2, ((2, 1), (3, 4)))
+        self.assertFalse(integer_costs(tg))
+        self.assertEqual(ucs(tg), [((2, 1), (3, 4)), ((1, 2), (3, 4))])
+
+    def test_unpackable_board(self):
+        # the 1x1 board of IOTest, a bare int, is searched without packing
+        self.assertEqual(ucs(TileGame(1, ((1)), ((1)))), [1])
+
+
+class IDSTest(unittest.TestCase):
+    """
+    Tests the depth-limited search behind ids.
+    """
+
+    def test_unreachable_goal_terminates(self):
+        # 0 and 1 form a cycle that never reaches the goal, 2
+        dg = DGraph([[None, 1, None], [1, None, None], [None, None, None]], {2})
+        self.assertEqual(ids(dg), [])
+
+    def test_cutoff_reported(self):
+        dg = DGraph([[None, 1, None], [None, None, 1], [None, None, None]], {2})
+        self.assertEqual(id_search(dg, 1), ([], True))
+        self.assertEqual(id_search(dg, 2), ([0, 1, 2], False))
+        self.assertEqual(ids(dg), [0, 1, 2])
+
+    def test_shortest_tilegame_path(self):
+        tg = TileGame(2, ((4, 3), (2, 1)), ((1, 2), (3, 4)))
+        self.assertEqual(len(ids(tg)), 5, "Path length should be 5")
+
+
+class IDAStarTest(unittest.TestCase):
+    """
+    Tests that idastar finds optimal paths, both through the incremental
+    TileGame search and the general one.
+    """
+
+    def test_tilegame(self):
+        boards = [
+            (((8, 2, 4), (6, 3, 1), (9, 5, 7)), 11),
+            (((4, 1, 2, 3), (6, 7, 8, 5), (9, 11, 12, 10), (16, 13, 14, 15)), 12),
+        ]
+        for board, length in boards:
+            tg = TileGame(len(board), board)
+            path = tilegame_idastar(tg)
+            self.assertEqual(path[0], board, "Path should start with the start state")
+            self.assertEqual(path[-1], tg.goal_state, "Path should end with the goal state")
+            self.assertEqual(len(path), length)
+            # the general search must agree with the incremental one
+            self.assertEqual(len(idastar(tg, tilegame_heuristic)), length)
+
+    def test_dgraph(self):
+        dg = DGraph(
+            [
+                [None, 10, 1, None],
+                [None, None, None, 1],
+                [None, 1, None, None],
+                [None, None, None, None],
+            ],
+            {3},
+        )
+        self.assertEqual(idastar(dg, lambda s: 0), [0, 2, 1, 3])
+        dg.goal_indices = set()
+        self.assertEqual(idastar(dg, lambda s: 0), [])
+
+
+class IncrementalHeuristicTest(unittest.TestCase):
+    """
+    Tests that the Manhattan deltas produced per swap match recomputing the
+    distance from scratch.
+    """
+
+    def test_deltas_match_full_recomputation(self):
+        board = ((3, 2, 1, 4), (5, 6, 7, 8), (9, 11, 10, 12), (14, 15, 16, 13))
+        goal_state = ((4, 5, 3), (1, 2, 6), (7, 8, 9))
+        problems = [
+            TileGame(4, board),
+            TileGame(3, ((9, 8, 7), (6, 5, 4), (3, 2, 1)), goal_state),
+        ]
+        for tg in problems:
+            start_state = tg.get_start_state()
+            manhattan = tg.manhattan_distance(start_state)
+            successors = tg.get_successors_with_delta(start_state)
+            self.assertEqual(
+                [c for c, _, _ in successors], list(tg.get_successors(start_state))
+            )
+            for child_state, cost, delta in successors:
+                self.assertEqual(cost, 1)
+                self.assertEqual(manhattan + delta, tg.manhattan_distance(child_state))
+
+            ptg = tg.to_packed()
+            packed_start = ptg.get_start_state()
+            self.assertEqual(ptg.manhattan_distance(packed_start), manhattan)
+            for (child_state, _, delta), (packed_child, _, packed_delta) in zip(
+                successors, ptg.get_successors_with_delta(packed_start)
+            ):
+                self.assertEqual(ptg.unpack(packed_child), child_state)
+                self.assertEqual(packed_delta, delta)
+
+    def test_matches_tilegame_heuristic(self):
+        board = ((8, 2, 4), (6, 3, 1), (9, 5, 7))
+        tg = TileGame(3, board)
+        manhattan = tg.manhattan_distance(board)
+        self.assertEqual(manhattan // 2, tilegame_heuristic(board))
+        for child_state, _, delta in tg.get_successors_with_delta(board):
+            h, _ = tilegame_heuristic_update(manhattan, delta)
+            self.assertEqual(h, tilegame_heuristic(child_state))
+
+    def test_astar_fast_path(self):
+        board = ((9, 8, 7), (6, 5, 4), (3, 2, 1))
+        tg = TileGame(3, board)
+        path = tilegame_astar(tg)
+        self.assertEqual(path[0], board)
+        self.assertEqual(path[-1], tg.goal_state)
+        self.assertEqual(len(path), 17, "Path length should be 17")
+
+    def test_astar_calls_the_given_heuristic(self):
+        board = ((8, 2, 4), (6, 3, 1), (9, 5, 7))
+        calls = []
+
+        def heur(state):
+            calls.append(state)
+            return tilegame_heuristic(state)
+
+        tg = TileGame(3, board)
+        self.assertEqual(len(astar(tg, heur)), len(tilegame_astar(tg)))
+        self.assertGreater(len(calls), 0)
+
+
+class PatternDatabaseTest(unittest.TestCase):
+    """
+    Tests building, persisting and using pattern databases.
+    """
+
+    boards = [
+        (((8, 2, 4), (6, 3, 1), (9, 5, 7)), 10),
+        (((3, 2, 1), (6, 5, 4), (9, 8, 7)), 9),
+        (((9, 8, 7), (6, 5, 4), (3, 2, 1)), 16),
+    ]
+
+    def test_rank_roundtrip(self):
+        ranks = np.arange(partial_permutations(9, 4))
+        self.assertTrue((rank_cells(unrank_cells(ranks, 9, 4), 9) == ranks).all())
+
+    def test_rank_cell_sequence_matches_rank_cells(self):
+        for n, k in ((4, 4), (9, 3)):
+            cells = np.array(list(itertools.permutations(range(n), k)))
+            weights = cell_weights(n, k)
+            ranks = [rank_cell_sequence(row.tolist(), weights) for row in cells]
+            self.assertEqual(ranks, list(range(partial_permutations(n, k))))
+            self.assertEqual(ranks, rank_cells(cells, n).tolist())
+
+    def test_admissible_and_dominates_manhattan(self):
+        pdb = PatternDatabase.build(3)
+        self.assertEqual(pdb(((1, 2, 3), (4, 5, 6), (7, 8, 9))), 0)
+        for board, distance in self.boards:
+            self.assertGreaterEqual(pdb(board), tilegame_heuristic(board))
+            self.assertLessEqual(pdb(board), distance)
+
+    def test_save_and_load(self):
+        pdb = PatternDatabase.build(3, [(1, 2, 3, 4), (5, 6, 7, 8, 9)])
+        with tempfile.TemporaryDirectory() as directory:
+            pdb.save(directory)
+            loaded = PatternDatabase.load(directory)
+            self.assertIsInstance(loaded.tables[0], np.memmap)
+            self.assertEqual(loaded.groups, pdb.groups)
+            for board, distance in self.boards:
+                self.assertEqual(loaded(board), pdb(board))
+            tg = TileGame(3, self.boards[0][0])
+            self.assertEqual(len(astar(tg, loaded)), self.boards[0][1] + 1)
+
+    def test_groups_must_cover_tiles(self):
+        with self.assertRaises(ValueError):
+            PatternDatabase.build(2, [(1, 2), (2, 3, 4)])
+
+
+class BidirectionalBFSTest(unittest.TestCase):
+    """
+    Tests that bidirectional_bfs finds shortest paths from both ends.
+    """
+
+    def test_tilegame(self):
+        boards = [
+            (((4, 3), (2, 1)), ((1, 2), (3, 4)), 5),
+            (((9, 8, 7), (6, 5, 4), (3, 2, 1)), ((4, 5, 3), (1, 2, 6), (7, 8, 9)), 15),
+            (((1, 3, 2, 4), (5, 6, 8, 7), (9, 11, 10, 12), (16, 14, 15, 13)), None, 9),
+        ]
+        for board, goal_state, length in boards:
+            tg = TileGame(len(board), board, goal_state)
+            path = bidirectional_bfs(tg)
+            self.assertEqual(path[0], board, "Path should start with the start state")
+            self.assertEqual(path[-1], tg.goal_state, "Path should end with the goal state")
+            self.assertEqual(len(path), length)
+            for state, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, tg.get_successors(state))
+
+    def test_packed_tilegame(self):
+        ptg = PackedTileGame(3, ((8, 2, 4), (6, 3, 1), (9, 5, 7)))
+        self.assertEqual(len(bidirectional_bfs(ptg)), 11, "Path length should be 11")
+
+    def test_dgraph(self):
+        # the only way to 3 is 0 -> 1 -> 2 -> 3; 3 -> 0 must not be followed backward
+        dg = DGraph(
+            [
+                [None, 1, None, None],
+                [None, None, 1, None],
+                [None, None, None, 1],
+                [1, None, None, None],
+            ],
+            {3},
+        )
+        self.assertEqual(bidirectional_bfs(dg), [0, 1, 2, 3])
+        dg.start_state = 3
+        self.assertEqual(bidirectional_bfs(dg), [3])
+        self.assertEqual(bidirectional_bfs(DGraph([[None, None], [1, None]], {1})), [])
+
+
+class DGraphTest(unittest.TestCase):
+    """
+    Tests the CSR representation behind DGraph.
+    """
+
+    matrix = [
+        [None, 10, 1, None],
+        [None, None, None, 1],
+        [None, 1, None, None],
+        [None, None, None, None],
+    ]
+    edges = [(0, 1, 10), (0, 2, 1), (1, 3, 1), (2, 1, 1)]
+
+    def test_matrix_and_edges_agree(self):
+        from_matrix = DGraph(self.matrix, {3})
+        from_edges = DGraph.from_edges(4, self.edges, {3})
+        self.assertIsNone(from_edges.matrix)
+        self.assertEqual(from_edges.num_nodes, 4)
+        self.assertEqual(from_edges.num_edges, 4)
+        for state in range(4):
+            self.assertEqual(
+                from_matrix.get_successors(state), from_edges.get_successors(state)
+            )
+            self.assertEqual(
+                from_matrix.get_predecessors(state), from_edges.get_predecessors(state)
+            )
+        self.assertEqual(from_edges.get_successors(0), {1: 10, 2: 1})
+        self.assertEqual(from_edges.get_predecessors(1), {0: 10, 2: 1})
+        self.assertEqual(astar(from_edges, lambda s: 0), [0, 2, 1, 3])
+
+    def test_parallel_edges_keep_cheapest(self):
+        dg = DGraph.from_edges(2, [(0, 1, 5), (0, 1, 2), (0, 1, 7)], {1})
+        self.assertEqual(dg.get_successors(0), {1: 2})
+
+    def test_edges_out_of_range(self):
+        with self.assertRaises(ValueError):
+            DGraph.from_edges(2, [(0, 2, 1)], {1})
+
+    def test_graph_file_roundtrip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = directory + "/graph.bin"
+            DGraph(self.matrix, {3}).save(path)
+            dg = DGraph.from_file(path, {3})
+            self.assertIsInstance(dg.targets, np.memmap)
+            self.assertEqual(dg.get_successors(0), {1: 10, 2: 1})
+            self.assertEqual(astar(dg, lambda s: 0), [0, 2, 1, 3])
+            self.assertEqual(bidirectional_bfs(dg), [0, 1, 3])
+
+    def test_convert_edge_list(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(directory + "/edges.txt", "w") as f:
+                f.write("# source target cost\n")
+                f.write("".join(f"{s} {t} {c}\n" for s, t, c in self.edges))
+            convert_edge_list(directory + "/edges.txt", directory + "/graph.bin")
+            dg = DGraph.from_file(directory + "/graph.bin", {3})
+            self.assertEqual(dg.num_nodes, 4)
+            self.assertEqual(dg.get_predecessors(1), {0: 10, 2: 1})
+
+            with open(directory + "/edges.txt", "w") as f:
+                f.write("0 1\n1 2\n")
+            convert_edge_list(directory + "/edges.txt", directory + "/graph.bin")
+            offsets, targets, costs = read_graph_file(directory + "/graph.bin")
+            self.assertEqual(offsets.tolist(), [0, 1, 2, 2])
+            self.assertEqual(costs.tolist(), [1, 1])
+
+    def test_large_sparse_graph(self):
+        # a 100,000-node path, far too large for a dense matrix
+        n = 100000
+        dg = DGraph.from_edges(n, ((i, i + 1, 1) for i in range(n - 1)), {n - 1})
+        self.assertEqual(len(bfs(dg)), n)
+
+
+class BatchTest(unittest.TestCase):
+    """
+    Tests solving many boards at once with solve_batch.
+    """
+
+    boards = [
+        (((8, 2, 4), (6, 3, 1), (9, 5, 7)), 11),
+        (((1, 2, 3), (4, 5, 6), (7, 8, 9)), 1),
+        (((3, 2, 1), (6, 5, 4), (9, 8, 7)), 10),
+        (((9, 8, 7), (6, 5, 4), (3, 2, 1)), 17),
+    ]
+
+    def _check_paths(self, boards, paths, lengths):
+        self.assertEqual(len(paths), len(boards))
+        for board, path, length in zip(boards, paths, lengths):
+            tg = TileGame(len(board), board)
+            self.assertEqual(path[0], board, "Path should start with the start state")
+            self.assertEqual(path[-1], tg.goal_state, "Path should end with the goal state")
+            self.assertEqual(len(path), length)
+            for state, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, tg.get_successors(state))
+
+    def test_astar(self):
+        boards = [board for board, _ in self.boards]
+        lengths = [length for _, length in self.boards]
+        self._check_paths(boards, solve_batch(boards), lengths)
+
+    def test_bfs(self):
+        boards = [((4, 3), (2, 1)), ((3, 2), (1, 4)), ((1, 2), (3, 4))]
+        self._check_paths(boards, solve_batch(boards, "bfs"), [5, 2, 1])
+
+    def test_manhattan_batch(self):
+        ptg = PackedTileGame(3, goal_state=((4, 5, 3), (1, 2, 6), (7, 8, 9)))
+        states = [ptg.pack(board) for board, _ in self.boards]
+        self.assertEqual(
+            manhattan_batch(ptg, np.array(states, dtype=np.uint64)).tolist(),
+            [ptg.manhattan_distance(state) for state in states],
+        )
+
+    def test_bad_input(self):
+        with self.assertRaises(ValueError):
+            solve_batch([((1, 2), (3, 4)), ((1, 2, 3), (4, 5, 6), (7, 8, 9))])
+        with self.assertRaises(ValueError):
+            solve_batch([((1, 2), (3, 4))], "dfs")
+        self.assertEqual(solve_batch([]), [])
+
+
+def failing_spec(resources):
+    raise RuntimeError("no such problem")
+
+
+class ParallelSolverTest(unittest.TestCase):
+    """
+    Tests solving problems across worker processes with ParallelSolver.
+    """
+
+    def test_solve(self):
+        resources = {
+            "pdb": (PatternDatabase.build, (3,)),
+            "graph": (DGraph.from_edges, (4, DGraphTest.edges, {3})),
+        }
+        boards = [board for board, _ in BatchTest.boards]
+        with ParallelSolver(2, resources) as solver:
+            problems = [TileGame(3, board) for board in boards]
+            results = list(solver.solve(problems, "astar", "pdb"))
+            self.assertEqual(sorted(r.index for r in results), [0, 1, 2, 3])
+            for result in results:
+                self.assertEqual(result.status, "solved")
+                self.assertEqual(result.path[0], boards[result.index])
+                self.assertEqual(len(result.path), BatchTest.boards[result.index][1])
+
+            queries = [
+                GraphQuery("graph", {3}),
+                GraphQuery("graph", {0}, 3),
+                failing_spec,
+            ]
+            results = sorted(solver.solve(queries, "astar"))
+            self.assertEqual(results[0].path, [0, 2, 1, 3])
+            self.assertEqual(results[1].status, "no_solution")
+            self.assertEqual(results[2].status, "error")
+            self.assertIn("no such problem", results[2].error)
+
+    def test_budgets(self):
+        tg = TileGame(3, ((9, 8, 7), (6, 5, 4), (3, 2, 1)))
+        with ParallelSolver(1) as solver:
+            [result] = solver.solve([tg], "bfs", max_expansions=10)
+            self.assertEqual(result.status, "budget_exceeded")
+            self.assertEqual(result.expansions, 11)
+            # the worker survives and takes the next problem
+            [result] = solver.solve([TileGame(2, ((3, 2), (1, 4)))], "bfs")
+            self.assertEqual(result.status, "solved")
+
+    def test_budgeted_problem(self):
+        problem = BudgetedProblem(TileGame(2, ((3, 2), (1, 4))), deadline=0)
+        with self.assertRaises(BudgetExceeded):
+            problem.get_successors(problem.get_start_state())
+
+
+class HDAStarTest(unittest.TestCase):
+    """
+    Tests that hdastar finds the same cheapest paths as astar.
+    """
+
+    def test_tilegame(self):
+        for board, length in BatchTest.boards[:3]:
+            tg = TileGame(3, board)
+            path = hdastar(tg, tilegame_heuristic, 3)
+            self.assertEqual(path[0], board, "Path should start with the start state")
+            self.assertEqual(path[-1], tg.goal_state, "Path should end with the goal state")
+            self.assertEqual(len(path), length)
+            for state, next_state in zip(path, path[1:]):
+                self.assertIn(next_state, tg.get_successors(state))
+
+    def test_dgraph(self):
+        dg = DGraph.from_edges(4, DGraphTest.edges, {3})
+        self.assertEqual(hdastar(dg, zero_heuristic, 2), [0, 2, 1, 3])
+        dg.goal_indices = set()
+        self.assertEqual(hdastar(dg, zero_heuristic, 2), [])
+
+    def test_partition(self):
+        dg = DGraph.from_edges(4, DGraphTest.edges, {3})
+        self.assertEqual(hdastar(dg, zero_heuristic, 2, partition=int), [0, 2, 1, 3])
+
+    def test_stable_hash_is_the_same_in_every_process(self):
+        code = "from hdastar import stable_hash; print(stable_hash(('a', b'b', 3)))"
+        hashes = set()
+        for seed in ("1", "2"):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            output = subprocess.run(
+                [sys.executable, "-c", code], env=env, capture_output=True, text=True
+            ).stdout
+            hashes.add(int(output))
+        self.assertEqual(hashes, {stable_hash(("a", b"b", 3))})
+
+
+class BudgetTest(unittest.TestCase):
+    """
+    Tests running searches within budgets with run_search.
+    """
+
+    hard_board = ((9, 8, 7), (6, 5, 4), (3, 2, 1))
+
+    def test_within_budget(self):
+        tg = TileGame(3, ((8, 2, 4), (6, 3, 1), (9, 5, 7)))
+        # exactly the expansions the search needs without a budget
+        needed = run_search(astar, tg, tilegame_heuristic).expansions
+        result = run_search(astar, tg, tilegame_heuristic, budget=Budget(needed))
+        self.assertEqual(result.status, "solved")
+        self.assertEqual(len(result.path), 11)
+        self.assertEqual(result.expansions, needed)
+        self.assertGreater(result.peak_frontier, 0)
+        self.assertIsNone(result.reason)
+
+        result = run_search(astar, tg, tilegame_heuristic, budget=Budget(needed - 1))
+        self.assertEqual(result.status, "budget_exceeded")
+
+        result = run_search(ids, DGraph([[None, 1], [1, None]], {}))
+        self.assertEqual(result.status, "no_solution")
+        self.assertEqual(result.peak_frontier, -1)
+
+    def test_limits(self):
+        tg = TileGame(3, self.hard_board)
+        result = run_search(bfs, tg, budget=Budget(max_expansions=50))
+        self.assertEqual(result.status, "budget_exceeded")
+        self.assertEqual((result.path, result.expansions), ([], 51))
+
+        result = run_search(dfs, tg, budget=Budget(max_frontier=100))
+        self.assertEqual(result.status, "budget_exceeded")
+        self.assertEqual(result.peak_frontier, 101)
+
+        result = run_search(ids, tg, budget=Budget(max_seconds=0.05))
+        self.assertEqual(result.status, "budget_exceeded")
+        self.assertLess(result.seconds, 5)
+
+        frontier = FifoFrontier()
+        result = run_search(bfs, tg, frontier=frontier, budget=Budget(max_frontier=100))
+        self.assertEqual(result.status, "budget_exceeded")
+        self.assertEqual(result.peak_frontier, 101)
+        self.assertEqual(len(frontier), 101)
+
+        with self.assertRaises(ValueError):
+            run_search(ids, tg, budget=Budget(max_frontier=100))
+
+    def test_anytime_astar(self):
+        tg = TileGame(3, self.hard_board)
+        # count the expansions to the first path and to the end, as run_search
+        # would, so the budget below stops the search between the two
+        counted = BudgetedProblem(tg)
+        searches = anytime_astar(counted, tilegame_heuristic, weight=3)
+        paths = [next(searches)]
+        to_first = counted.expansions
+        paths.extend(searches)
+        self.assertEqual(len(paths[-1]), 17, "Last path should be the shortest")
+        for path, next_path in zip(paths, paths[1:]):
+            self.assertLess(len(next_path), len(path))
+        self.assertLess(to_first, counted.expansions)
+
+        weighted = run_search(
+            anytime_astar, tg, tilegame_heuristic, 3, budget=Budget(to_first)
+        )
+        self.assertEqual(weighted.status, "budget_exceeded")
+        self.assertEqual(weighted.path, paths[0])
+
+    def test_generator_searches(self):
+        # these produce SearchEvents, not paths
+        dg = DGraph([[None, 1], [1, None]], set())
+        for algorithm in (iter_bfs, iter_dfs):
+            result = run_search(algorithm, dg)
+            self.assertEqual((result.status, result.path), ("no_solution", []))
+
+        tg = TileGame(3, ((8, 2, 4), (6, 3, 1), (9, 5, 7)))
+        result = run_search(iter_astar, tg, tilegame_heuristic)
+        self.assertEqual(result.status, "solved")
+        self.assertEqual(result.path, astar(tg, tilegame_heuristic))
+        result = run_search(iter_bfs, tg, budget=Budget(max_expansions=5))
+        self.assertEqual((result.status, result.path), ("budget_exceeded", []))
+
+    def test_tilegame_searches(self):
+        # these expand the packed form of the problem, which must be budgeted
+        tg = TileGame(3, self.hard_board)
+        for algorithm in (tilegame_astar, tilegame_idastar):
+            result = run_search(algorithm, tg, budget=Budget(max_expansions=5))
+            self.assertEqual(result.status, "budget_exceeded")
+            self.assertEqual(result.expansions, 6)
+
+        tg = TileGame(3, ((8, 2, 4), (6, 3, 1), (9, 5, 7)))
+        needed = run_search(tilegame_astar, tg).expansions
+        result = run_search(tilegame_astar, tg, budget=Budget(needed))
+        self.assertEqual((result.status, len(result.path)), ("solved", 11))
+        self.assertGreater(result.peak_frontier, 0)
+
+        with ParallelSolver(max_workers=1) as solver:
+            for name in ("tilegame_astar", "tilegame_idastar"):
+                [result] = solver.solve([tg], name, max_expansions=5)
+                self.assertEqual(result.status, "budget_exceeded")
+                self.assertEqual(result.expansions, 6)
+
+    def test_budgeted_frontier(self):
+        frontier = BudgetedFrontier(FifoFrontier())
+        for i in range(3):
+            frontier.put(i)
+        frontier.get()
+        frontier.put(3)
+        self.assertEqual((len(frontier), frontier.peak), (3, 3))
+
+
+class SearchStatsTest(unittest.TestCase):
+    """
+    Tests the SearchStats recorded by the searches.
+    """
+
+    board = ((8, 2, 4), (6, 3, 1), (9, 5, 7))
+
+    def test_bfs(self):
+        # 0 -> 1 -> 2 and 0 -> 2: expanding 0 and then 1 generates 2 twice
+        dg = DGraph([[None, 1, 1], [None, None, 1], [None, None, None]], {3})
+        stats = SearchStats()
+        self.assertEqual(bfs(dg, stats=stats), [])
+        self.assertEqual(
+            (stats.expanded, stats.generated, stats.duplicates), (3, 3, 1)
+        )
+        self.assertEqual((stats.peak_frontier, stats.peak_visited), (2, 3))
+        self.assertGreater(stats.seconds[SUCCESSORS], 0)
+        self.assertGreater(stats.seconds[FRONTIER], 0)
+
+    def test_astar(self):
+        expected = astar(TileGame(3, self.board), tilegame_heuristic)
+        for heur in (tilegame_heuristic, lambda state: tilegame_heuristic(state)):
+            stats = SearchStats()
+            path = astar(TileGame(3, self.board), heur, stats=stats)
+            self.assertEqual(len(path), len(expected))
+            self.assertGreater(stats.expanded, 0)
+            self.assertEqual(stats.generated, 12 * stats.expanded)
+            self.assertGreater(stats.duplicates, 0)
+            self.assertGreater(stats.peak_visited, stats.peak_frontier)
+            self.assertGreater(stats.seconds[HEURISTIC], 0)
+
+    def test_depth_first(self):
+        dg = DGraph([[None, 1], [1, None]], {})
+        stats = SearchStats()
+        self.assertEqual(ids(dg, stats), [])
+        # depth 0 expands nothing, depth 1 expands just 0, and depth 2 expands
+        # 0 and then 1, whose only successor, 0, is already on the path
+        self.assertEqual((stats.expanded, stats.duplicates), (3, 1))
+        self.assertEqual(stats.peak_frontier, 2)
+
+        stats = SearchStats()
+        path = idastar(TileGame(3, self.board), tilegame_heuristic, stats)
+        self.assertEqual(len(path), 11)
+        self.assertGreater(stats.expanded, 0)
+        self.assertLessEqual(stats.peak_frontier, 11)
+
+    def test_progress(self):
+        reports = []
+        stats = SearchStats(lambda s: reports.append(s.expanded), every=5)
+        bfs(TileGame(3, ((1, 2, 3), (4, 5, 6), (8, 9, 7))), stats=stats)
+        self.assertGreater(len(reports), 1)
+        self.assertEqual(reports, list(range(5, stats.expanded + 1, 5)))
+
+
+class BenchmarkTest(unittest.TestCase):
+    """
+    Tests the seeded corpora and the benchmark runner.
+    """
+
+    def test_random_start(self):
+        boards = [TileGame.random_start(3, np.random.default_rng(7)) for _ in range(2)]
+        self.assertEqual(boards[0], boards[1])
+        tg = TileGame(3, rng=np.random.default_rng(7))
+        self.assertEqual(tg.get_start_state(), boards[0])
+
+    def test_tilegame_corpus(self):
+        boards = tilegame_corpus(3, 5, 4, seed=1)
+        self.assertEqual(boards, tilegame_corpus(3, 5, 4, seed=1))
+        self.assertEqual(len(set(boards)), 4)
+        for board in boards:
+            self.assertEqual(len(bfs(TileGame(3, board))), 6)
+
+    def test_random_dgraph(self):
+        dg = random_dgraph(100, 3, seed=2)
+        same = random_dgraph(100, 3, seed=2)
+        self.assertTrue(np.array_equal(dg.targets, same.targets))
+        self.assertEqual(dg.goal_indices, same.goal_indices)
+        self.assertLessEqual(dg.num_edges, 300)
+        self.assertNotIn(0, dg.goal_indices)
+
+    def test_run_benchmark(self):
+        problems = [TileGame(3, board) for board in tilegame_corpus(3, 4, 2)]
+        for algorithm in ("astar", "bidirectional_bfs"):
+            result = run_benchmark(algorithm, problems, tilegame_heuristic, 1, 3)
+            self.assertEqual((result["problems"], result["solved"]), (2, 2))
+            self.assertEqual(result["mean_path_length"], 5)
+            self.assertGreater(result["expansions"], 0)
+            self.assertGreater(result["peak_memory_bytes"], 0)
+            latency = result["latency_seconds"]
+            self.assertLessEqual(latency["min"], latency["p50"])
+            self.assertLessEqual(latency["p99"], latency["max"])
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """
+    Tests the TranspositionTable and the searches that use one.
+    """
+
+    def test_replacement(self):
+        depth = TranspositionTable(1, "depth")
+        depth.store("a", 2, 5)
+        depth.store("b", 3, 1)
+        self.assertIn("a", depth)
+        depth.store("b", 1, 1)
+        self.assertIn("b", depth)
+
+        lru = TranspositionTable(1, "lru")
+        lru.store("a", 2, 5)
+        lru.store("b", 3, 1)
+        self.assertIn("b", lru)
+        self.assertEqual(len(lru), 1)
+
+    def test_passes(self):
+        table = TranspositionTable(16)
+        table.store("a", 2, 5)
+        self.assertTrue(table.seen("a", 3))
+        self.assertFalse(table.seen("a", 1))
+        self.assertEqual((table.bound("a", 1), table.bound("a", 7)), (5, 7))
+        table.new_pass()
+        self.assertFalse(table.seen("a", 3))
+        self.assertEqual(table.bound("a", 1), 5, "Bounds outlive passes")
+        table.clear()
+        self.assertNotIn("a", table)
+
+    def test_ids(self):
+        dg = DGraph([[None, 1, None], [1, None, None], [None, None, None]], {2})
+        self.assertEqual(ids(dg, table=TranspositionTable()), [])
+        dg = DGraph([[None, 1, 1], [None, None, 1], [None, None, None]], {2})
+        self.assertEqual(ids(dg, table=TranspositionTable()), [0, 2])
+
+        for board in (((2, 1), (4, 3)), ((4, 3), (2, 1))):
+            tg = TileGame(2, board)
+            for size in (4, 1 << 10):
+                path = ids(tg, table=TranspositionTable(size))
+                self.assertEqual(len(path), len(bfs(tg)))
+                self.assertEqual(path[-1], tg.goal_state)
+
+    def test_idastar(self):
+        tg = TileGame(3, ((8, 2, 4), (6, 3, 1), (9, 5, 7)))
+        for policy in ("depth", "lru"):
+            table = TranspositionTable(1 << 12, policy)
+            first, second = SearchStats(), SearchStats()
+            self.assertEqual(len(idastar(tg, tilegame_heuristic, first, table)), 11)
+            self.assertEqual(len(idastar(tg, tilegame_heuristic, second, table)), 11)
+            self.assertLess(second.expanded, first.expanded, "Bounds should be reused")
+
+        dg = DGraph([[None, 1, 4], [None, None, 1], [None, None, None]], {2})
+        table = TranspositionTable()
+        self.assertEqual(idastar(dg, zero_heuristic, table=table), [0, 1, 2])
+
+    def test_cycles_without_goal(self):
+        # bounds learned around these cycles grow every pass, and never
+        # reach inf, so the searches must notice the space is exhausted
+        edges = [(0, 7), (2, 9), (7, 0), (4, 2), (6, 6), (1, 2), (6, 8), (2, 6)]
+        edges += [(6, 5), (3, 2), (2, 2), (10, 3), (7, 9), (4, 4), (9, 9), (2, 8)]
+        edges += [(7, 10), (1, 7), (0, 3), (3, 7)]
+        dg = DGraph.from_edges(11, [(s, t, 1) for s, t in edges], set())
+        self.assertEqual(ids(dg), [])
+        self.assertEqual(ids(dg, table=TranspositionTable(1 << 10)), [])
+        table = TranspositionTable(1 << 10)
+        self.assertEqual(idastar(dg, zero_heuristic, table=table), [])
+
+    def test_cycles_keep_paths_optimal(self):
+        # 1 is searched first from 0 directly, with 3 -> 1 back onto the
+        # path; 3 must not learn from that that the goal is out of reach
+        # from it, as 0 -> 2 -> 3 -> 1 -> 4 is the cheapest path
+        edges = [(0, 1, 4), (0, 2, 1), (2, 3, 1), (3, 1, 1), (1, 3, 1), (1, 4, 10)]
+        dg = DGraph.from_edges(5, edges, {4})
+        heuristic = [0, 0, 12, 0, 0].__getitem__
+        path = idastar(dg, heuristic, table=TranspositionTable(1 << 10))
+        self.assertEqual(path, [0, 2, 3, 1, 4])
+
+
+class SolutionCacheTest(unittest.TestCase):
+    """
+    Tests the SolutionCache and the symmetries it uses.
+    """
+
+    board = ((8, 2, 4), (6, 3, 1), (9, 5, 7))
+
+    def variants(self, board):
+        # the boards equivalent to board, made by rotating or reflecting the
+        # goal's tiles: the goal turned the same way then renames the tiles
+        goal = TileGame(len(board), board).goal_state
+        flat_goal = [tile for row in goal for tile in row]
+        flat_board = [tile for row in board for tile in row]
+        variants = set()
+        for destination in grid_symmetries(len(board)):
+            moved_goal = [0] * len(flat_goal)
+            moved_board = [0] * len(flat_board)
+            for cell, destination_cell in enumerate(destination):
+                moved_goal[destination_cell] = flat_goal[cell]
+                moved_board[destination_cell] = flat_board[cell]
+            labels = dict(zip(moved_goal, flat_goal))
+            flat = [labels[tile] for tile in moved_board]
+            variants.add(tuple(tuple(flat[i : i + 3]) for i in range(0, 9, 3)))
+        return variants
+
+    def assert_valid_path(self, tg, path, length):
+        self.assertEqual(path[0], tg.get_start_state())
+        self.assertEqual(path[-1], tg.goal_state)
+        self.assertEqual(len(path), length)
+        for state, next_state in zip(path, path[1:]):
+            self.assertIn(next_state, tg.get_successors(state))
+
+    def test_symmetries(self):
+        self.assertEqual(len(grid_symmetries(1)), 1)
+        self.assertEqual(len(grid_symmetries(2)), 8)
+        self.assertEqual(len(grid_symmetries(3)), 8)
+        canonical = canonicalize(self.board, TileGame(3, self.board).goal_state)[0]
+        for variant in self.variants(self.board):
+            goal = TileGame(3, variant).goal_state
+            self.assertEqual(canonicalize(variant, goal)[0], canonical)
+
+    def test_symmetric_hits(self):
+        cache = SolutionCache()
+        variants = self.variants(self.board)
+        for variant in variants:
+            tg = TileGame(3, variant)
+            self.assert_valid_path(tg, cache.solve(tg), 11)
+        self.assertEqual((cache.misses, cache.hits), (1, len(variants) - 1))
+
+        tg = TileGame(3, self.board)
+        self.assert_valid_path(tg, cache.solve(tg, bfs), 11)
+        self.assertEqual(cache.misses, 2)
+
+    def test_searches_kept_apart(self):
+        cache = SolutionCache()
+        tg = TileGame(2, ((2, 3), (4, 1)))
+        # dfs finds a longer path, which must not answer for astar
+        self.assertEqual(len(cache.solve(tg, dfs)), 6)
+        self.assertEqual(len(cache.solve(tg)), 4)
+        self.assertEqual(len(cache.solve(tg, dfs)), 6)
+        self.assertEqual((cache.misses, cache.hits), (2, 1))
+
+        cache.solve(tg, lambda problem: bfs(problem), tag="bfs")
+        cache.solve(tg, bfs, tag="bfs")
+        self.assertEqual((cache.misses, cache.hits), (3, 2))
+
+    def test_lru_and_disk(self):
+        boards = [self.board, ((1, 2, 3), (4, 5, 6), (8, 9, 7))]
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/solutions.sqlite"
+            with SolutionCache(max_entries=1, path=path) as cache:
+                for board in boards:
+                    cache.solve(TileGame(3, board))
+                self.assertEqual(len(cache), 1)
+                cache.solve(TileGame(3, boards[0]))
+                self.assertEqual((cache.misses, cache.disk_hits), (2, 1))
+
+            with SolutionCache(path=path) as cache:
+                for board in boards:
+                    tg = TileGame(3, board)
+                    length = len(astar(tg, tilegame_heuristic))
+                    self.assert_valid_path(tg, cache.solve(tg), length)
+                self.assertEqual((cache.misses, cache.disk_hits), (0, 2))
+
+
+class GeneratorSearchTest(unittest.TestCase):
+    """
+    Tests the generator searches and the Paths they produce.
+    """
+
+    # 0 -> 3 has the fewest edges, but 0 -> 1 -> 3 costs least
+    graph = DGraph(
+        [
+            [None, 1, 4, 10],
+            [None, None, None, 1],
+            [None, None, None, 1],
+            [None, None, None, None],
+        ],
+        {3},
+    )
+
+    def goal_event(self, events):
+        events = list(events)
+        self.assertTrue(all(event.kind != GOAL for event in events[:-1]))
+        self.assertEqual(events[-1].kind, GOAL)
+        return events, events[-1]
+
+    def test_same_paths_as_list_searches(self):
+        tg = TileGame(2, ((4, 3), (2, 1)), ((1, 2), (3, 4)))
+        for problem in (tg, self.graph):
+            _, goal = self.goal_event(iter_bfs(problem))
+            self.assertEqual(list(goal.path), bfs(problem))
+            _, goal = self.goal_event(iter_dfs(problem))
+            self.assertEqual(list(goal.path), dfs(problem))
+        _, goal = self.goal_event(iter_astar(self.graph, lambda state: 0))
+        self.assertEqual(goal.path, [0, 1, 3])
+        self.assertEqual(goal.depth, 2)
+
+    def test_events(self):
+        tg = TileGame(3, ((1, 2, 3), (4, 5, 6), (8, 9, 7)))
+        events, goal = self.goal_event(iter_bfs(tg))
+        layers = [event.depth for event in events if event.kind == LAYER_DONE]
+        self.assertEqual(layers, list(range(goal.depth)))
+        depths = [event.depth for event in events if event.kind == EXPANDED]
+        self.assertEqual(depths, sorted(depths))
+        self.assertEqual(len(goal.path), goal.depth + 1)
+
+        events, goal = self.goal_event(iter_astar(tg, tilegame_heuristic))
+        layers = [event.depth for event in events if event.kind == LAYER_DONE]
+        self.assertEqual(layers, sorted(layers))
+        self.assertEqual(len(goal.path), len(astar(tg, tilegame_heuristic)))
+
+        unreachable = DGraph([[None, 1], [1, None]], {})
+        for events in (iter_bfs(unreachable), iter_dfs(unreachable)):
+            self.assertNotIn(GOAL, [event.kind for event in events])
+
+    def test_cancel(self):
+        tg = TileGame(3, ((9, 8, 7), (6, 5, 4), (3, 2, 1)))
+        events = iter_bfs(tg)
+        first = list(itertools.islice(events, 100))
+        self.assertEqual(len(first), 100)
+        events.close()
+        self.assertEqual(list(events), [])
+
+    def test_path(self):
+        nodes = ["a", "b", "c", "d"]
+        path = Path(nodes, [-1, 0, 1, 0], 2)
+        self.assertEqual(len(path), 3)
+        self.assertEqual(list(path), ["a", "b", "c"])
+        self.assertEqual((path[0], path[-1], path[1:]), ("a", "c", ["b", "c"]))
+        self.assertEqual(path.indices().tolist(), [0, 1, 2])
+        self.assertEqual(path, ["a", "b", "c"])
+        self.assertNotEqual(path, Path(nodes, [-1, 0, 1, 0], 3))
+
+    def test_path_detaches_from_table(self):
+        searches = (iter_bfs, iter_dfs, lambda graph: iter_astar(graph, lambda s: 0))
+        for search in searches:
+            _, goal = self.goal_event(search(self.graph))
+            self.assertIsNone(goal.path.nodes)
+            self.assertIsNone(goal.path.parents)
+            self.assertEqual(goal.path[0], 0)
+            self.assertEqual(goal.path[-1], 3)
+
+        nodes = ["a", "b", "c", "d"]
+        path = Path(nodes, [-1, 0, 1, 0], 2)
+        path.detach()
+        self.assertEqual((list(path), path[1:]), (["a", "b", "c"], ["b", "c"]))
+        self.assertEqual(path.indices().tolist(), [0, 1, 2])
+
+
+class StateTableTest(unittest.TestCase):
+    """
+    Tests interning states in a StateTable.
+    """
+
+    def test_ids_and_paths(self):
+        table = StateTable()
+        a = table.add("a")
+        b = table.add("b", a)
+        c = table.add("c", b)
+        table.add("d", a)
+        self.assertEqual((a, b, c, len(table)), (0, 1, 2, 4))
+        self.assertEqual(table.ids["c"], c)
+        self.assertIn("d", table)
+        self.assertEqual(table.parents.tolist(), [NO_PARENT, 0, 1, 0])
+        self.assertEqual(table.path_to(c), ["a", "b", "c"])
+        self.assertIsNone(table.costs)
+
+        table = StateTable(costs=True)
+        table.add("a")
+        table.add("b", 0, 2.5)
+        self.assertEqual(table.costs.tolist(), [0, 2.5])
+
+    def test_frontier_holds_ids(self):
+        tg = TileGame(2, ((4, 3), (2, 1)), ((1, 2), (3, 4)))
+        frontier = FifoFrontier()
+        put = frontier.put
+        items = []
+        frontier.put = lambda item: (items.append(item), put(item))
+        path = bfs(tg, frontier)
+        self.assertEqual(len(path), 5)
+        self.assertEqual(path[0], tg.get_start_state())
+        self.assertEqual(items, list(range(len(items))), "Ids are dense and in order")
+
+    def test_numpy_4x4_board(self):
+        start = TileGame.random_start(4, np.random.default_rng(1))
+        goal = TileGame.tuple_to_list(start)
+        goal[3][2], goal[3][3] = goal[3][3], goal[3][2]
+        goal[0][0], goal[1][0] = goal[1][0], goal[0][0]
+        tg = TileGame(4, start, TileGame.list_to_tuple(goal))
+        path = bfs(tg)
+        self.assertEqual((path[0], path[-1]), (start, tg.goal_state))
+        self.assertEqual(len(path), 3)
+
+    def test_subclass_is_not_packed(self):
+        class AnyCornerGame(TileGame):
+            def is_goal_state(self, state):
+                return state[0][0] == 1
+
+        tg = AnyCornerGame(2, ((2, 1), (3, 4)))
+        self.assertEqual(bfs(tg), [((2, 1), (3, 4)), ((1, 2), (3, 4))])
+        self.assertEqual(bfs(AnyCornerGame(2, ((1, 4), (3, 2)))), [((1, 4), (3, 2))])
+
+
+class LandmarksTest(unittest.TestCase):
+    """
+    Tests the landmark (ALT) heuristics for DGraphs.
+    """
+
+    def path_cost(self, graph, path):
+        return sum(graph.get_successors(a)[b] for a, b in zip(path, path[1:]))
+
+    def test_admissible(self):
+        graph = random_dgraph(500, 3, seed=4, num_goals=3)
+        landmarks = Landmarks.build(graph, 6)
+        self.assertEqual(landmarks.count, 6)
+        distances = np.min(
+            [shortest_distances(graph.reverse_csr(), g) for g in graph.goal_indices],
+            axis=0,
+        )
+        heur = landmarks.heuristic(graph.goal_indices)
+        for node in range(graph.num_nodes):
+            self.assertLessEqual(heur(node), distances[node] + 1e-9)
+        for goal in graph.goal_indices:
+            self.assertEqual(heur(goal), 0)
+
+    def test_fewer_expansions(self):
+        graph = random_dgraph(20000, 4, seed=3)
+        uniform, alt = SearchStats(), SearchStats()
+        expected = astar(graph, zero_heuristic, stats=uniform)
+        path = astar(graph, landmark_heuristic(graph), stats=alt)
+        self.assertEqual(self.path_cost(graph, path), self.path_cost(graph, expected))
+        self.assertLess(alt.expanded * 10, uniform.expanded)
+
+    def test_unreachable(self):
+        # 2 cannot reach the goal, 1
+        graph = DGraph([[None, 1, None], [None, None, None], [1, None, None]], {1}, 2)
+        heur = Landmarks.build(graph, 3).heuristic({1})
+        self.assertEqual((heur(0), heur(1)), (1, 0))
+        self.assertEqual(Landmarks.build(graph).heuristic([])(0), float("inf"))
+
+    def test_save_and_load(self):
+        graph = random_dgraph(200, 3, seed=5)
+        landmarks = Landmarks.build(graph, 4)
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/landmarks.npy"
+            landmarks.save(path)
+            loaded = Landmarks.load(path)
+            self.assertTrue(np.array_equal(loaded.to_landmarks, landmarks.to_landmarks))
+            heur, loaded_heur = (
+                tables.heuristic(graph.goal_indices) for tables in (landmarks, loaded)
+            )
+            for node in range(graph.num_nodes):
+                self.assertEqual(heur(node), loaded_heur(node))
+            del loaded, loaded_heur
+
+
+class QueryEngineTest(unittest.TestCase):
+    """
+    Tests answering many queries against one graph with a QueryEngine.
+    """
+
+    graph = random_dgraph(2000, 3, seed=6)
+
+    def path_cost(self, path):
+        return sum(self.graph.get_successors(a)[b] for a, b in zip(path, path[1:]))
+
+    def assert_cheapest(self, path, start, goals):
+        csr = (self.graph.offsets, self.graph.targets, self.graph.costs)
+        expected = astar(DGraph(None, goals, start, csr), zero_heuristic)
+        self.assertEqual(bool(path), bool(expected))
+        if path:
+            self.assertEqual((path[0], path[-1] in goals), (start, True))
+            self.assertEqual(self.path_cost(path), self.path_cost(expected))
+
+    def test_batch(self):
+        rng = np.random.default_rng(1)
+        queries = [(3, {int(goal)}) for goal in rng.integers(2000, size=5)]
+        queries += [(int(start), {42}) for start in rng.integers(2000, size=5)]
+        queries += [(7, {100, 200, 300}), (8, {9}), (5, set()), (11, {11})]
+        engine = QueryEngine(self.graph)
+        paths = engine.query_batch(queries)
+        self.assertEqual(len(paths), len(queries))
+        for path, (start, goals) in zip(paths, queries):
+            self.assert_cheapest(path, start, goals)
+        # one tree from 3, and one to 42
+        self.assertEqual(engine.num_trees, 2)
+
+    def test_trees_are_reused(self):
+        engine = QueryEngine(self.graph, max_trees=1)
+        tree = engine.tree(3)
+        self.assertIs(engine.tree(3), tree)
+        self.assert_cheapest(engine.query(3, {500}), 3, {500})
+        engine.tree(4, forward=False)
+        self.assertEqual(engine.num_trees, 1)
+        self.assertIsNot(engine.tree(3), tree, "The tree from 3 was evicted")
+        self.assert_cheapest(engine.query(10, {4}), 10, {4})
+
+    def test_from_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.graph.save(f"{directory}/graph.bin")
+            Landmarks.build(self.graph, 4).save(f"{directory}/landmarks.npy")
+            engine = QueryEngine.from_files(
+                f"{directory}/graph.bin", f"{directory}/landmarks.npy"
+            )
+            self.assertEqual(engine.landmarks.count, 4)
+            for start, goal in ((0, 1), (2, 1999), (1000, 3)):
+                self.assert_cheapest(engine.query(start, {goal}), start, {goal})
+            del engine
+
+
+def grid_dgraph(dim: int, seed: int = 0) -> DGraph:
+    """
+    A dim x dim grid of nodes, road-network-like, with an edge to each
+    neighbour most of the time, and a last node that no edge touches.
+    """
+    rng = np.random.default_rng(seed)
+    edges = []
+    for row, col in itertools.product(range(dim), repeat=2):
+        for r, c in ((row, col + 1), (row + 1, col), (row, col - 1), (row - 1, col)):
+            if 0 <= r < dim and 0 <= c < dim and rng.random() < 0.9:
+                edges.append((row * dim + col, r * dim + c, float(rng.integers(1, 10))))
+    return DGraph.from_edges(dim * dim + 1, edges, set())
+
+
+class ContractionHierarchyTest(unittest.TestCase):
+    """
+    Tests contraction hierarchy queries against astar on the original graph.
+    """
+
+    graph = grid_dgraph(15)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.hierarchy = ContractionHierarchy.build(cls.graph)
+
+    def path_cost(self, path):
+        return sum(self.graph.get_successors(a)[b] for a, b in zip(path, path[1:]))
+
+    def assert_cheapest(self, hierarchy, start, goals):
+        path = hierarchy.query(start, goals)
+        csr = (self.graph.offsets, self.graph.targets, self.graph.costs)
+        expected = astar(DGraph(None, goals, start, csr), zero_heuristic)
+        self.assertEqual(bool(path), bool(expected))
+        if path:
+            self.assertEqual((path[0], path[-1] in goals), (start, True))
+            # path_cost fails if the path uses an edge not in the graph
+            self.assertEqual(self.path_cost(path), self.path_cost(expected))
+
+    def test_line(self):
+        graph = DGraph.from_edges(3, [(0, 1, 1.0), (1, 2, 1.0)], set())
+        hierarchy = ContractionHierarchy.build(graph)
+        self.assertEqual(hierarchy.query(0, {2}), [0, 1, 2])
+        self.assertEqual(hierarchy.query(2, {0}), [])
+        self.assertEqual(hierarchy.query(1, {1}), [1])
+
+    def test_queries(self):
+        self.assertGreater(self.hierarchy.num_shortcuts, 0)
+        rng = np.random.default_rng(4)
+        for _ in range(100):
+            start, goal = rng.integers(self.graph.num_nodes - 1, size=2).tolist()
+            self.assert_cheapest(self.hierarchy, start, {goal})
+
+    def test_goal_sets(self):
+        rng = np.random.default_rng(5)
+        for _ in range(20):
+            start = int(rng.integers(self.graph.num_nodes - 1))
+            goals = set(rng.integers(self.graph.num_nodes - 1, size=3).tolist())
+            self.assert_cheapest(self.hierarchy, start, goals)
+        self.assertEqual(self.hierarchy.query(0, set()), [])
+
+    def test_unreachable(self):
+        isolated = self.graph.num_nodes - 1
+        self.assertEqual(self.hierarchy.query(0, {isolated}), [])
+        self.assertEqual(self.hierarchy.query(isolated, {0}), [])
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.hierarchy.save(f"{directory}/hierarchy.npz")
+            hierarchy = ContractionHierarchy.load(f"{directory}/hierarchy.npz")
+        self.assertTrue(np.array_equal(hierarchy.rank, self.hierarchy.rank))
+        for start, goal in ((0, 224), (224, 0), (17, 100)):
+            self.assert_cheapest(hierarchy, start, {goal})
+
+
+class DistanceTableTest(unittest.TestCase):
+    """
+    Tests answering tile game queries from the distances of every board.
+    """
+
+    boards = PatternDatabaseTest.boards
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = DistanceTable.build(3)
+
+    def test_every_board_is_reached(self):
+        self.assertFalse((self.table.distances == 255).any())
+        self.assertEqual(int(self.table.distances.max()), 16)
+        self.assertEqual(DistanceTable.build(2).distances.tolist().count(0), 1)
+        with self.assertRaises(ValueError):
+            DistanceTable.build(4)
+
+    def test_distances_and_paths(self):
+        for board, distance in self.boards:
+            self.assertEqual(self.table.distance(board), distance)
+            tg = TileGame(3, board)
+            path = self.table.solve(tg)
+            self.assertEqual(len(path), distance + 1)
+            self.assertEqual((path[0], path[-1]), (board, tg.goal_state))
+            for state, successor in zip(path, path[1:]):
+                self.assertIn(successor, tg.get_successors(state))
+
+    def test_other_goals(self):
+        start, goal = self.boards[1][0], self.boards[0][0]
+        tg = TileGame(3, start, goal)
+        path = self.table.solve(tg)
+        self.assertEqual(self.table.distance(start, goal), len(path) - 1)
+        self.assertEqual(len(path), len(astar(tg, tilegame_heuristic)))
+        self.assertEqual(path[-1], goal)
+        self.assertEqual(self.table.solve(TileGame(3, goal, goal)), [goal])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.table.save(f"{directory}/distances.npy")
+            loaded = DistanceTable.load(f"{directory}/distances.npy")
+            self.assertIsInstance(loaded.distances, np.memmap)
+            self.assertEqual(loaded.dim, 3)
+            board, distance = self.boards[2]
+            self.assertEqual(len(loaded.solve(TileGame(3, board))), distance + 1)
+            del loaded
+
+
 if __name__ == "__main__":
     print("Unit testing started")
     unittest.main()